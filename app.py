@@ -1,3 +1,4 @@
+import atexit
 import io
 import json
 import math
@@ -5,6 +6,9 @@ import os
 import random 
 import re
 import base64
+import hashlib
+import tempfile
+import uuid
 from datetime import datetime
 from urllib import parse, request
 
@@ -16,6 +20,17 @@ import streamlit as st
 from dotenv import load_dotenv
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 
+from confessions_corpus import ConfessionsCorpus
+from leaderboard_rollups import LeaderboardRollups
+from keyword_taxonomy import KeywordTaxonomy
+from leaderboard_writer import LeaderboardWriter
+from model_router import ModelRouter, load_routes
+from prompt_cache import GeminiCacheBackend, PromptPrefixCache
+from roast_jobs import QueueFullError, RoastJobQueue
+from session_store import SessionStateManager, trim_chat_history
+from text_layout import block_height, ellipsize, fit_text, metrics_for, wrap_text
+from warmup import WarmupRunner, readiness_file_for
+
 import ssl
 
 # --- DUCT TAPE SSL FIX FOR MAC / CAMPUS WI-FI ---
@@ -36,31 +51,73 @@ load_dotenv()
 MEME_TEMPLATES = [
     "meme.jpg",
     "meme2.jpg",
-    "meme3.jpg", 
+    "meme3.jpeg", 
 ]
 
+def get_secret_or_env(key, default=""):
+    try:
+        return st.secrets[key]
+    except (FileNotFoundError, KeyError):
+        return os.getenv(key, default)
+
+MODEL_ROUTING_FILE = get_secret_or_env("MODEL_ROUTING_FILE", "model_routing.json")
+# Explicit opt-in only: FAKE_GEMINI=0/false must never serve real students stub roasts
+USE_FAKE_GEMINI = str(get_secret_or_env("FAKE_GEMINI", "")).strip().lower() in ("1", "true", "yes")
+
 # Check Streamlit secrets first, then local .env for Gemini Key
 try:
     api_key = st.secrets["GEMINI_API_KEY"]
 except (FileNotFoundError, KeyError):
     api_key = os.getenv("GEMINI_API_KEY")
 
-if api_key:
+@st.cache_resource
+def get_model_router(use_fake, routing_mtime=None):
+    # One router per process (rebuilt when model_routing.json changes); it owns the model clients + cooldowns
+    if use_fake:
+        # Offline stub for load tests / local dev (see fake_gemini.py)
+        from fake_gemini import FakeGenerativeModel
+        model_factory = FakeGenerativeModel.from_env
+    else:
+        model_factory = genai.GenerativeModel
+    return ModelRouter(load_routes(MODEL_ROUTING_FILE), model_factory)
+
+def routing_file_mtime():
+    try:
+        return os.path.getmtime(MODEL_ROUTING_FILE)
+    except OSError:
+        return None
+
+if USE_FAKE_GEMINI:
+    api_key = api_key or "fake"
+    model_router = get_model_router(True, routing_file_mtime())
+elif api_key:
     # Initialize the Gemini Client with the REST fix
     genai.configure(api_key=api_key, transport="rest")
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model_router = get_model_router(False, routing_file_mtime())
 else:
-    model = None
-
-def get_secret_or_env(key, default=""):
-    try:
-        return st.secrets[key]
-    except (FileNotFoundError, KeyError):
-        return os.getenv(key, default)
+    model_router = None
 
 SUPABASE_URL = get_secret_or_env("SUPABASE_URL")
 SUPABASE_ANON_KEY = get_secret_or_env("SUPABASE_ANON_KEY")
-LOCAL_LEADERBOARD_FILE = "hall_of_shame_local.csv"
+LOCAL_LEADERBOARD_FILE = get_secret_or_env("LEADERBOARD_FILE", "hall_of_shame_local.csv")
+LOCAL_ROLLUP_DIR = get_secret_or_env("LEADERBOARD_ROLLUP_DIR", "hall_of_shame_rollups")
+TAXONOMY_FILE = get_secret_or_env("TAXONOMY_FILE", "smu_taxonomy.json")
+LEADERBOARD_FLUSH_BATCH = int(get_secret_or_env("LEADERBOARD_FLUSH_BATCH", "20"))
+LEADERBOARD_FLUSH_SECONDS = float(get_secret_or_env("LEADERBOARD_FLUSH_SECONDS", "2"))
+CORPUS_POLL_SECONDS = int(get_secret_or_env("CORPUS_POLL_SECONDS", "30"))
+STORY_EXPORT_FORMAT = get_secret_or_env("STORY_EXPORT_FORMAT", "JPEG")
+STORY_EXPORT_MAX_BYTES = int(get_secret_or_env("STORY_EXPORT_MAX_BYTES", "450000"))
+MEME_EXPORT_FORMAT = get_secret_or_env("MEME_EXPORT_FORMAT", "WEBP")
+MEME_EXPORT_MAX_BYTES = int(get_secret_or_env("MEME_EXPORT_MAX_BYTES", "120000"))
+SESSION_SPILL_DIR = get_secret_or_env("SESSION_SPILL_DIR", os.path.join(tempfile.gettempdir(), "smu_roast_sessions"))
+SESSION_IDLE_TTL = int(get_secret_or_env("SESSION_IDLE_TTL", "7200"))
+MAX_CHAT_MESSAGES = int(get_secret_or_env("MAX_CHAT_MESSAGES", "30"))
+# One file per server port so replicas sharing a host each report their own readiness
+READINESS_FILE = get_secret_or_env("READINESS_FILE", readiness_file_for(st.get_option("server.port")))
+PROMPT_CACHE_TTL = int(get_secret_or_env("PROMPT_CACHE_TTL", "3600"))
+ROAST_WORKERS = int(get_secret_or_env("ROAST_WORKERS", "4"))
+ROAST_MAX_PENDING = int(get_secret_or_env("ROAST_MAX_PENDING", "32"))
+ROAST_POLL_SECONDS = float(get_secret_or_env("ROAST_POLL_SECONDS", "1"))
 
 # 2. Page Configuration
 st.set_page_config(page_title="SMU HR Portal", page_icon="🏢", layout="wide")
@@ -98,53 +155,66 @@ def extract_text_from_pdf(uploaded_file):
     text = "".join([page.get_text() for page in doc])
     return text
 
-@st.cache_data
 def load_smu_lore():
+    # Keyed on mtime so an edited lore file is re-read (and rolls the prompt cache) without a restart
+    try:
+        lore_mtime = os.path.getmtime("smu_lore.txt")
+    except OSError:
+        lore_mtime = None
+    return read_smu_lore(lore_mtime)
+
+@st.cache_data
+def read_smu_lore(lore_mtime):
     try:
         with open("smu_lore.txt", "r", encoding="utf-8") as file:
             return file.read()
     except FileNotFoundError:
         return "No SMU lore found. Proceeding with standard corporate hostility."
 
-@st.cache_data
-def load_smu_confessions(filepath="smu_broad_v2.csv"):
+def load_keyword_taxonomy():
+    # Same mtime trick as the lore: editing the taxonomy recompiles the automaton on the next run
     try:
-        if os.path.exists(filepath):
-            return pd.read_csv(filepath)
-        else:
-            return pd.DataFrame()
-    except Exception as e:
-        print(f"Confessions file error: {e}")
-        return pd.DataFrame()
+        taxonomy_mtime = os.path.getmtime(TAXONOMY_FILE)
+    except OSError:
+        taxonomy_mtime = None
+    return compile_keyword_taxonomy(taxonomy_mtime)
+
+@st.cache_resource
+def compile_keyword_taxonomy(taxonomy_mtime):
+    try:
+        return KeywordTaxonomy.from_file(TAXONOMY_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Keyword taxonomy unavailable, using defaults only: {e}")
+        return KeywordTaxonomy(default_lore=["stress", "bidding", "internship", "project"])
+
+@st.cache_resource
+def get_confessions_corpus(filepath="smu_broad_v2.csv"):
+    # Parsed once per process; a watcher thread appends new rows as the CSV grows
+    return ConfessionsCorpus(filepath, poll_seconds=CORPUS_POLL_SECONDS)
+
+def load_smu_confessions(filepath="smu_broad_v2.csv"):
+    return get_confessions_corpus(filepath).df
 
 def get_dynamic_lore(df, faculty, candidate_text, top_n=3):
     if df.empty:
         return "No live campus intel available right now."
 
-    if 'quality_flag' in df.columns:
+    if 'search_text' in df.columns:
+        # Already the corpus' quality-filtered, lower-cased retrieval frame
+        search_df = df
+    elif 'quality_flag' in df.columns:
         search_df = df[df['quality_flag'].isin(['high', 'medium'])]
     else:
         search_df = df
 
-    keywords = []
-    if faculty == "LKCSB":
-        keywords = ['finance', 'casing', 'snake', 'biz', 'group project', 'internship', 'networking']
-    elif faculty == "SCIS":
-        keywords = ['leetcode', 'basement', 'code', 'social', 'is', 'cs', 'swe']
-    elif faculty == "SOE":
-        keywords = ['stata', 'econs', 'stats', 'curve', 'math']
-    elif faculty == "SOA":
-        keywords = ['audit', 'big 4', 'accounting', 'sleep', 'ta']
-    elif faculty == "SOL":
-        keywords = ['law', 'reading', 'argue', 'library']
-    
-    candidate_lower = candidate_text.lower()
-    if 'gpa' in candidate_lower: keywords.append('gpa')
-    if 'dean' in candidate_lower: keywords.append('flex')
-    if 'president' in candidate_lower or 'director' in candidate_lower: keywords.append('cca')
-
-    pattern = '|'.join(keywords) if keywords else 'stress|bidding|internship|project'
-    matched = search_df[search_df['cleaned_text'].astype(str).str.contains(pattern, case=False, na=False)]
+    # Faculty terms plus lore tags for every resume signal, matched in one pass over the resume
+    taxonomy = load_keyword_taxonomy()
+    keywords = taxonomy.lore_keywords(faculty, candidate_text) or taxonomy.default_lore
+    pattern = '|'.join(re.escape(k) for k in keywords)
+    if 'search_text' in search_df.columns:
+        matched = search_df[search_df['search_text'].str.contains(pattern, na=False)]
+    else:
+        matched = search_df[search_df['cleaned_text'].astype(str).str.contains(pattern, case=False, na=False)]
 
     if len(matched) < top_n:
         matched = search_df.sample(min(len(search_df), top_n))
@@ -157,6 +227,91 @@ def get_dynamic_lore(df, faculty, candidate_text, top_n=3):
 
     return "\n".join(lore_strings)
 
+@st.cache_resource
+def get_roast_pool():
+    # One pool per process, shared by every session
+    return RoastJobQueue(workers=ROAST_WORKERS, max_pending=ROAST_MAX_PENDING)
+
+@st.cache_resource
+def get_prompt_cache(model_name):
+    # Cached content is tied to one model, so each roast tier gets its own
+    if USE_FAKE_GEMINI:
+        from fake_gemini import FakeCacheBackend, FakeGenerativeModel
+        backend = FakeCacheBackend(FakeGenerativeModel.from_env(model_name))
+    else:
+        backend = GeminiCacheBackend(model_name)
+    return PromptPrefixCache(backend, ttl_seconds=PROMPT_CACHE_TTL)
+
+def build_roast_prompt_prefix(smu_lore):
+    # Everything here is identical across candidates -> served from the provider's context cache
+    return f"""
+    You are a highly toxic, Gen Z corporate AI HR Manager evaluating a candidate from Singapore Management University (SMU).
+    You will be given a Manager Persona, the candidate's pronouns and faculty, live campus intel and the candidate profile. Never break character and always use the given pronouns.
+
+    SMU LORE & STEREOTYPES:
+    {smu_lore}
+
+    YOUR MISSION:
+    Read the candidate profile. Write a brutal, highly specific "Performance Review."
+    TONE: Combine professional corporate jargon with biting Gen Z slang.
+
+    CRITICAL INSTRUCTION: You MUST use the "LIVE CAMPUS INTEL" provided with the candidate to make the roast feel eerily realistic. Quote or reference the specific themes of those confessions.
+
+    Format your review EXACTLY like this:
+
+    **1. Executive Summary:** A scathing opening paragraph summarizing why this candidate's career is lowkey a flop.
+
+    **2. Granular Synergies (or Lack Thereof):** Use bullet points to pick out at least 3 to 4 VERY SPECIFIC details from their resume. Tie their "achievements" to the toxic traits mentioned in the LIVE CAMPUS INTEL.
+
+    **3. Action Items:** Provide one final passive-aggressive sentence on what their actual career trajectory looks like.
+
+    **4. CRITICAL RULE:** At the very end of your response, you MUST add exactly these 8 lines on separate lines (Do not add any text after this):
+    TOXICITY_SCORE: [insert number between 1 and 100]
+    DELUSION_LEVEL: [insert number between 1 and 100]
+    BUZZWORD_DENSITY: [insert number between 1 and 100]
+    CORPORATE_SLAVERY_APTITUDE: [insert number between 1 and 100]
+    ACTUAL_EMPLOYABILITY: [insert number between 1 and 100]
+    DREAM_JOB: [predict their ideal fantasy career based on profile]
+    ACTUAL_DESTINY: [predict their realistic fate in one sharp sentence]
+    MEME_CAPTION: [write a hilarious, short 10-word meme caption summarizing their biggest red flag]
+    """
+
+def build_roast_prompt_suffix(roast_style, pronouns, faculty, dynamic_lore, candidate_text):
+    return f"""
+    Your Persona: {roast_style}. Do not break character.
+    Candidate's Pronouns: {pronouns}. You MUST use these pronouns.
+    Candidate's Faculty: {faculty}.
+
+    LIVE CAMPUS INTEL (TELEGRAM CONFESSIONS):
+    Here are actual, recent anonymous confessions from the SMU student body related to this candidate's vibe/faculty:
+    {dynamic_lore}
+
+    Here is the candidate text to destroy: {candidate_text}
+    """
+
+def run_roast_job(router, prompt_prefix, suffix_parts):
+    # The router picks the tier (timeouts, benching, fallback); each tier serves the prefix from its own cache
+    response = router.generate_with_prefix("roast", prompt_prefix, suffix_parts, prefix_cache_for=get_prompt_cache)
+    return response.text
+
+@st.cache_resource
+def get_session_manager():
+    return SessionStateManager(SESSION_SPILL_DIR, idle_ttl=SESSION_IDLE_TTL)
+
+def get_spilled_render(session_key, prefix, fingerprint_parts, ext, render_fn):
+    # Rendered exports live on disk per session; session state never holds the bytes
+    manager = get_session_manager()
+    fingerprint = hashlib.sha1(repr(fingerprint_parts).encode("utf-8")).hexdigest()[:16]
+    name = f"{prefix}-{fingerprint}.{ext}"
+    data = manager.get_blob(session_key, name)
+    if data is None:
+        data = render_fn()
+        if data is None:
+            return None
+        manager.drop_blobs(session_key, f"{prefix}-")
+        manager.put_blob(session_key, name, data)
+    return data
+
 def get_score(pattern, text, default=50):
     match = re.search(pattern, text, flags=re.IGNORECASE)
     if not match:
@@ -192,100 +347,167 @@ def format_roast_with_scorecard(clean_roast, toxicity, radar_scores, dream_job,
         f"- **Actual Destiny:** {actual_destiny}"
     )
 
+@st.cache_resource
+def load_meme_templates():
+    # Decode + shrink every template once per process; missing files get reported here, not on every rerun
+    templates = {}
+    for template_path in MEME_TEMPLATES:
+        try:
+            img = Image.open(template_path).convert("RGB")
+            img.thumbnail((600, 600), Image.Resampling.LANCZOS)
+            templates[template_path] = img
+        except Exception as e:
+            print(f"Meme template '{template_path}' unavailable: {e}")
+    return templates
+
+MEME_FONT_PATHS = [
+    "impact.ttf", "Impact.ttf",
+    "/System/Library/Fonts/Supplemental/Impact.ttf",
+    "/Library/Fonts/Impact.ttf",
+    "C:\\Windows\\Fonts\\impact.ttf",
+    "arialbd.ttf", "Arial Bold.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+    "C:\\Windows\\Fonts\\arialbd.ttf"
+]
+
+@st.cache_resource
+def load_meme_font(size):
+    for font_path in MEME_FONT_PATHS:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except Exception:
+            continue
+    return ImageFont.load_default()
+
 def generate_custom_meme(caption, template_path):
     try:
-        if not os.path.exists(template_path):
+        template = load_meme_templates().get(template_path)
+        if template is None:
             return None
-            
-        img = Image.open(template_path).convert("RGB")
-        max_size = (600, 600)
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
+
+        img = template.copy()
         draw = ImageDraw.Draw(img)
         img_w, img_h = img.size
 
-        target_size = max(24, int(img_w / 12)) 
-        font = None
-        
-        possible_fonts = [
-            "impact.ttf", "Impact.ttf",
-            "/System/Library/Fonts/Supplemental/Impact.ttf",
-            "/Library/Fonts/Impact.ttf",
-            "C:\\Windows\\Fonts\\impact.ttf",
-            "arialbd.ttf", "Arial Bold.ttf",
-            "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-            "C:\\Windows\\Fonts\\arialbd.ttf"
-        ]
-
-        for font_path in possible_fonts:
-            try:
-                font = ImageFont.truetype(font_path, target_size)
-                break  
-            except Exception:
-                continue
-                
-        if font is None:
-            font = ImageFont.load_default()
-
+        # Largest size up to the old fixed size that keeps the caption in the bottom half
         margin = 20
-        max_width = img_w - (margin * 2)
-        words = caption.upper().split()
-        lines = []
-        current_line = ""
-        
-        for word in words:
-            test_line = current_line + word + " "
-            try:
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                text_width = bbox[2] - bbox[0]
-            except AttributeError:
-                text_width, _ = draw.textsize(test_line, font=font)
-                
-            if text_width <= max_width:
-                current_line = test_line
-            else:
-                lines.append(current_line.strip())
-                current_line = word + " "
-        if current_line:
-            lines.append(current_line.strip())
+        line_spacing = 10
+        metrics, lines = fit_text(
+            caption.upper(),
+            load_meme_font,
+            max_width=img_w - (margin * 2),
+            max_height=int(img_h * 0.5) - 30,
+            max_size=max(24, int(img_w / 12)),
+            min_size=14,
+            line_spacing=line_spacing,
+        )
 
-        line_heights = []
-        for line in lines:
-            try:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                line_heights.append(bbox[3] - bbox[1])
-            except AttributeError:
-                _, h = draw.textsize(line, font=font)
-                line_heights.append(h)
-                
-        total_text_height = sum(line_heights) + (10 * (len(lines) - 1))
-        
-        y_text = img_h - total_text_height - 30 
-        if y_text < 20: 
+        total_text_height = block_height(metrics, len(lines), line_spacing)
+        y_text = img_h - total_text_height - 30
+        if y_text < 20:
             y_text = 20
 
-        for i, line in enumerate(lines):
-            try:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                text_w = bbox[2] - bbox[0]
-            except AttributeError:
-                text_w, _ = draw.textsize(line, font=font)
-                
-            x_text = (img_w - text_w) / 2
-
-            outline_range = max(2, int(target_size / 12))
-            for x_offset in range(-outline_range, outline_range+1):
-                for y_offset in range(-outline_range, outline_range+1):
-                    draw.text((x_text+x_offset, y_text+y_offset), line, font=font, fill="black")
-            
-            draw.text((x_text, y_text), line, font=font, fill="white")
-            y_text += line_heights[i] + 10
+        outline_range = max(2, int(metrics.font.size / 12))
+        for line in lines:
+            x_text = (img_w - metrics.width(line)) / 2
+            draw.text((x_text, y_text), line, font=metrics.font, fill="white",
+                      stroke_width=outline_range, stroke_fill="black")
+            y_text += metrics.line_height + line_spacing
 
         return img
     except Exception as e:
         print(f"Meme Generation Error: {e}")
         return None
 
+IMAGE_EXPORT_FORMATS = {
+    "PNG": ("image/png", "png"),
+    "WEBP": ("image/webp", "webp"),
+    "JPEG": ("image/jpeg", "jpg"),
+}
+
+def encode_image(img, fmt="PNG", max_bytes=None):
+    fmt = fmt.upper() if fmt.upper() in IMAGE_EXPORT_FORMATS else "PNG"
+
+    def save(image, **params):
+        out = io.BytesIO()
+        image.save(out, format=fmt, **params)
+        return out.getvalue()
+
+    if fmt == "PNG":
+        data = save(img, optimize=True)
+        # Over budget: drop to a shrinking palette (the cards are mostly flat colour anyway)
+        colors = 256
+        while max_bytes and len(data) > max_bytes and colors >= 16:
+            data = save(img.quantize(colors=colors, method=Image.Quantize.FASTOCTREE), optimize=True)
+            colors //= 2
+        return data
+
+    params = {"optimize": True, "progressive": True} if fmt == "JPEG" else {"method": 4}
+    data = save(img, quality=90, **params)
+    if not max_bytes or len(data) <= max_bytes:
+        return data
+
+    # Binary search the highest quality that still fits the byte budget
+    lo, hi = 30, 89
+    best = None
+    while lo <= hi:
+        quality = (lo + hi) // 2
+        candidate = save(img, quality=quality, **params)
+        if len(candidate) <= max_bytes:
+            best, lo = candidate, quality + 1
+        else:
+            hi = quality - 1
+    return best if best is not None else save(img, quality=30, **params)
+
+def export_mime_and_ext(fmt):
+    return IMAGE_EXPORT_FORMATS.get(fmt.upper(), IMAGE_EXPORT_FORMATS["PNG"])
+
+def render_meme_bytes(caption, template_path, fmt="PNG", max_bytes=None):
+    meme_img = generate_custom_meme(caption, template_path)
+    if meme_img is None:
+        return None
+    return encode_image(meme_img, fmt, max_bytes)
+
+def apply_roast_result(raw_roast, meta):
+    st.session_state.roast_style = meta.get("roast_style")
+    st.session_state.pronouns = meta.get("pronouns", "They/Them")
+    st.session_state.current_score = get_score(r"TOXICITY_SCORE:\s*(\d+)", raw_roast)
+    st.session_state.radar_scores = {
+        "Delusion": get_score(r"DELUSION_LEVEL:\s*(\d+)", raw_roast),
+        "Buzzwords": get_score(r"BUZZWORD_DENSITY:\s*(\d+)", raw_roast),
+        "Slavery Aptitude": get_score(r"CORPORATE_SLAVERY_APTITUDE:\s*(\d+)", raw_roast),
+        "Employability": get_score(r"ACTUAL_EMPLOYABILITY:\s*(\d+)", raw_roast),
+    }
+    st.session_state.dream_job = get_line_value(r"DREAM_JOB:\s*(.*)", raw_roast, "Corporate Unicorn")
+    st.session_state.actual_destiny = get_line_value(r"ACTUAL_DESTINY:\s*(.*)", raw_roast, "Big 4 spreadsheet gladiator")
+    st.session_state.meme_caption = get_line_value(r"MEME_CAPTION:\s*(.*)", raw_roast, "When you put Excel as a skill but can't do a VLOOKUP")
+    # Lock the template for this roast so chat reruns don't reshuffle the meme
+    available_templates = list(load_meme_templates().keys())
+    st.session_state.meme_template = random.choice(available_templates) if available_templates else None
+
+    clean_roast = clean_generated_roast(raw_roast)
+    clean_roast = format_roast_with_scorecard(
+        clean_roast=clean_roast,
+        toxicity=st.session_state.current_score,
+        radar_scores=st.session_state.radar_scores,
+        dream_job=st.session_state.dream_job,
+        actual_destiny=st.session_state.actual_destiny,
+    )
+
+    st.session_state.messages = [{"role": "assistant", "content": clean_roast}]
+
+    entry = {
+        "created_at": datetime.now().isoformat(),
+        "nickname": meta.get("nickname", "Anonymous Warrior"),
+        "faculty": meta.get("faculty", "Unknown"),
+        "toxicity": st.session_state.current_score,
+        "delusion": st.session_state.radar_scores["Delusion"],
+        "employability": st.session_state.radar_scores["Employability"],
+        "actual_destiny": st.session_state.actual_destiny,
+    }
+    # Only enqueues; the writer thread persists it, so storage never delays or fails the roast
+    add_candidate_to_leaderboard(entry)
+
 def fallback_resume_from_inputs(data):
     return f"""# {data.get('name', 'Candidate Name')}
 {data.get('email', 'email@example.com')} | {data.get('phone', '+65 XXXX XXXX')} | {data.get('linkedin', 'linkedin.com/in/yourname')}
@@ -304,7 +526,7 @@ def fallback_resume_from_inputs(data):
 """
 
 def build_resume_draft_from_inputs(data):
-    if not model: return fallback_resume_from_inputs(data)
+    if not model_router: return fallback_resume_from_inputs(data)
     prompt = f"""
     You are an elite resume writer for SMU students.
     Create a one-page internship resume in concise plain text/markdown format.
@@ -318,24 +540,46 @@ def build_resume_draft_from_inputs(data):
     {json.dumps(data, ensure_ascii=True, indent=2)}
     """
     try:
-        response = model.generate_content(prompt)
+        response = model_router.for_call("resume").generate_content(prompt)
         return response.text
     except Exception:
         return fallback_resume_from_inputs(data)
 
+@st.cache_resource
+def get_leaderboard_rollups():
+    rollups = LeaderboardRollups(LOCAL_ROLLUP_DIR)
+    if rollups.is_empty:
+        rollups.backfill(LOCAL_LEADERBOARD_FILE)
+    return rollups
+
+@st.cache_resource
+def get_leaderboard_writer():
+    writer = LeaderboardWriter(
+        LOCAL_LEADERBOARD_FILE,
+        rollups=get_leaderboard_rollups(),
+        batch_size=LEADERBOARD_FLUSH_BATCH,
+        flush_interval=LEADERBOARD_FLUSH_SECONDS,
+    )
+    # Drain the queue on interpreter shutdown (Ctrl+C / SIGTERM on the streamlit server)
+    atexit.register(writer.close)
+    return writer
+
 def add_candidate_to_leaderboard(entry):
-    row = pd.DataFrame([entry])
-    if os.path.exists(LOCAL_LEADERBOARD_FILE):
-        old = pd.read_csv(LOCAL_LEADERBOARD_FILE)
-        row = pd.concat([old, row], ignore_index=True)
-    row.to_csv(LOCAL_LEADERBOARD_FILE, index=False)
+    try:
+        get_leaderboard_writer().submit(entry)
+    except Exception as e:
+        print(f"Leaderboard enqueue failed: {e}")
     return "local"
 
 def get_today_leaderboard(sort_mode="Most Delusional", top_n=10):
-    if not os.path.exists(LOCAL_LEADERBOARD_FILE):
+    # Entries still in the write-behind queue are shown too, so a fresh roast appears immediately
+    csv_text, pending = get_leaderboard_writer().snapshot()
+    df = pd.read_csv(csv_text) if csv_text is not None else pd.DataFrame()
+    if pending:
+        df = pd.concat([df, pd.DataFrame(pending)], ignore_index=True)
+    if df.empty:
         return pd.DataFrame(), "local"
 
-    df = pd.read_csv(LOCAL_LEADERBOARD_FILE)
     if "created_at" in df.columns:
         df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
         df = df[df["created_at"].dt.date == datetime.now().date()]
@@ -346,12 +590,17 @@ def get_today_leaderboard(sort_mode="Most Delusional", top_n=10):
     return df.head(top_n), "local"
 
 def clear_leaderboard_data():
-    if os.path.exists(LOCAL_LEADERBOARD_FILE):
-        try:
-            os.remove(LOCAL_LEADERBOARD_FILE)
-            return True, "Deleted local CSV leaderboard."
-        except Exception as exc:
-            return False, f"Local CSV delete failed: {exc}"
+    writer = get_leaderboard_writer()
+    # Hold the writer's I/O lock so a batch can't land between the delete and the rollup reset
+    with writer.io_lock:
+        writer.discard_pending()
+        get_leaderboard_rollups().clear()
+        if os.path.exists(LOCAL_LEADERBOARD_FILE):
+            try:
+                os.remove(LOCAL_LEADERBOARD_FILE)
+                return True, "Deleted local CSV leaderboard."
+            except Exception as exc:
+                return False, f"Local CSV delete failed: {exc}"
     return True, "No leaderboard data found to delete."
 
 def draw_radar_polygon(draw, center, radius, scores, labels):
@@ -374,30 +623,29 @@ def draw_radar_polygon(draw, center, radius, scores, labels):
     if len(points) >= 3:
         draw.polygon(points, fill="#8A704C", outline="#151C55")
 
-def wrap_text_by_chars(text, width=48):
-    words = text.split()
-    lines = []
-    line = ""
-    for word in words:
-        trial = (line + " " + word).strip()
-        if len(trial) > width:
-            if line:
-                lines.append(line)
-            line = word
-        else:
-            line = trial
-    if line:
-        lines.append(line)
-    return lines
+STORY_W, STORY_H = 1080, 1920
+STORY_SAFE_Y_MIN = 250
+STORY_SAFE_Y_MAX = STORY_H - 250
 
-def generate_story_card(headshot_file, show_safe_overlay=False):
-    w, h = 1080, 1920
+@st.cache_resource
+def load_story_fonts():
+    try:
+        return (
+            ImageFont.truetype("/System/Library/Fonts/Supplemental/Avenir Next.ttc", 64),
+            ImageFont.truetype("/System/Library/Fonts/Supplemental/Avenir Next.ttc", 36),
+            ImageFont.truetype("/System/Library/Fonts/Supplemental/Avenir Next.ttc", 28),
+        )
+    except Exception:
+        return ImageFont.load_default(), ImageFont.load_default(), ImageFont.load_default()
+
+@st.cache_resource
+def get_story_card_base():
+    # Everything that is identical on every card: gradient, panels, headings, footer
+    w, h = STORY_W, STORY_H
+    safe_y_min, safe_y_max = STORY_SAFE_Y_MIN, STORY_SAFE_Y_MAX
     canvas = Image.new("RGB", (w, h), "#0E1630")
     draw = ImageDraw.Draw(canvas)
-    safe_top = 250
-    safe_bottom = 250
-    safe_y_min = safe_top
-    safe_y_max = h - safe_bottom
+    title_font, body_font, mini_font = load_story_fonts()
 
     top = (14, 22, 48)
     bottom = (35, 78, 125)
@@ -408,31 +656,39 @@ def generate_story_card(headshot_file, show_safe_overlay=False):
         b = int(top[2] + (bottom[2] - top[2]) * t)
         draw.line([(0, y), (w, y)], fill=(r, g, b))
 
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Avenir Next.ttc", 64)
-        body_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Avenir Next.ttc", 36)
-        mini_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Avenir Next.ttc", 28)
-    except Exception:
-        title_font = ImageFont.load_default()
-        body_font = ImageFont.load_default()
-        mini_font = ImageFont.load_default()
-
     card = (40, 40, w - 40, h - 40)
     draw.rounded_rectangle(card, radius=36, fill="#F8FAFC", outline="#8A704C", width=5)
     draw.text((84, safe_y_min + 5), "SMU HR DISCIPLINARY NOTICE", fill="#0D1B3D", font=title_font)
     draw.text((84, safe_y_min + 78), "Share this to your Story and tag your faculty.", fill="#4A5568", font=mini_font)
 
-    score = st.session_state.get("current_score", 50)
     draw.rounded_rectangle((84, safe_y_min + 125, 720, safe_y_min + 220), radius=20, fill="#FFE2E2", outline="#EF4444", width=3)
-    draw.text((110, safe_y_min + 156), f"TOXICITY SCORE: {score}/100", fill="#B42318", font=body_font)
 
-    dream = st.session_state.get("dream_job", "Unknown")
-    destiny = st.session_state.get("actual_destiny", "Unknown")
     draw.rounded_rectangle((84, safe_y_min + 245, 996, safe_y_min + 420), radius=20, fill="#EEF2FF", outline="#4F46E5", width=2)
     draw.text((110, safe_y_min + 270), "Dream:", fill="#1E3A8A", font=body_font)
-    draw.text((260, safe_y_min + 275), dream[:52], fill="#111827", font=mini_font)
     draw.text((110, safe_y_min + 335), "Actual:", fill="#1E3A8A", font=body_font)
-    draw.text((260, safe_y_min + 340), destiny[:52], fill="#B91C1C", font=mini_font)
+
+    draw.rounded_rectangle((84, safe_y_min + 460, 996, safe_y_min + 885), radius=24, fill="#FFFFFF", outline="#D1D5DB", width=2)
+    draw.text((110, safe_y_min + 485), "Clout Diagnostics", fill="#0D1B3D", font=body_font)
+
+    draw.rounded_rectangle((84, safe_y_min + 915, 996, safe_y_max - 35), radius=24, fill="#F8FAFC", outline="#D1D5DB", width=2)
+    draw.text((110, safe_y_min + 940), "Manager Notes", fill="#0D1B3D", font=body_font)
+
+    draw.text((84, safe_y_max - 70), "#SMU #GrowthMindset #AlwaysLearning", fill="#E2E8F0", font=mini_font)
+    draw.text((84, safe_y_max - 35), "@smu.hr.portal", fill="#CBD5E1", font=mini_font)
+    return canvas
+
+def generate_story_card(headshot_file, score, dream, destiny, radar, excerpt, show_safe_overlay=False):
+    canvas = get_story_card_base().copy()
+    draw = ImageDraw.Draw(canvas)
+    safe_y_min, safe_y_max = STORY_SAFE_Y_MIN, STORY_SAFE_Y_MAX
+    title_font, body_font, mini_font = load_story_fonts()
+
+    draw.text((110, safe_y_min + 156), f"TOXICITY SCORE: {score}/100", fill="#B42318", font=body_font)
+    mini_metrics = metrics_for(mini_font)
+    # Dream/Actual run up to the headshot frame, or the panel edge when there is none
+    value_width = (720 if headshot_file is not None else 970) - 260
+    draw.text((260, safe_y_min + 275), ellipsize(dream, mini_metrics, value_width), fill="#111827", font=mini_font)
+    draw.text((260, safe_y_min + 340), ellipsize(destiny, mini_metrics, value_width), fill="#B91C1C", font=mini_font)
 
     if headshot_file is not None:
         try:
@@ -447,31 +703,24 @@ def generate_story_card(headshot_file, show_safe_overlay=False):
         except Exception:
             pass
 
-    radar = st.session_state.get("radar_scores") or {}
+    radar = radar or {}
     labels = list(radar.keys()) if radar else ["Delusion", "Buzzwords", "Slavery", "Employability"]
     scores = list(radar.values()) if radar else [50, 50, 50, 50]
-    draw.rounded_rectangle((84, safe_y_min + 460, 996, safe_y_min + 885), radius=24, fill="#FFFFFF", outline="#D1D5DB", width=2)
-    draw.text((110, safe_y_min + 485), "Clout Diagnostics", fill="#0D1B3D", font=body_font)
     draw_radar_polygon(draw, center=(540, safe_y_min + 685), radius=160, scores=scores, labels=labels)
 
-    y = safe_y_min + 915
-    draw.rounded_rectangle((84, y, 996, safe_y_max - 35), radius=24, fill="#F8FAFC", outline="#D1D5DB", width=2)
-    draw.text((110, y + 25), "Manager Notes", fill="#0D1B3D", font=body_font)
-    y += 80
-    excerpt = (st.session_state.messages[0]["content"][:420] + "...") if st.session_state.messages else "No record"
-    for line in wrap_text_by_chars(excerpt, width=58):
+    y = safe_y_min + 995
+    for line in wrap_text(excerpt, mini_metrics, 996 - 110 - 26):
         if y > safe_y_max - 100:
             break
         draw.text((110, y), line, fill="#1F2937", font=mini_font)
         y += 40
 
-    draw.text((84, safe_y_max - 70), "#SMU #GrowthMindset #AlwaysLearning", fill="#E2E8F0", font=mini_font)
-    draw.text((84, safe_y_max - 35), "@smu.hr.portal", fill="#CBD5E1", font=mini_font)
+    return canvas
 
-    out = io.BytesIO()
-    canvas.save(out, format="PNG")
-    out.seek(0)
-    return out
+def render_story_card_bytes(headshot_bytes, score, dream, destiny, radar_items, excerpt, fmt="PNG", max_bytes=None):
+    hs_file = io.BytesIO(headshot_bytes) if headshot_bytes else None
+    canvas = generate_story_card(hs_file, score, dream, destiny, dict(radar_items), excerpt)
+    return encode_image(canvas, fmt, max_bytes)
 
 # 5. Initialize Chat Session State
 if "messages" not in st.session_state:
@@ -490,12 +739,51 @@ if "actual_destiny" not in st.session_state:
     st.session_state.actual_destiny = "Unknown"
 if "linkedin_post" not in st.session_state:
     st.session_state.linkedin_post = ""
-if "last_headshot_bytes" not in st.session_state:
-    st.session_state.last_headshot_bytes = None
+if "headshot_digest" not in st.session_state:
+    # The headshot itself is spilled to the session's disk store; only its digest stays in memory
+    st.session_state.headshot_digest = None
 if "resume_draft_text" not in st.session_state:
     st.session_state.resume_draft_text = ""
 if "meme_caption" not in st.session_state:
     st.session_state.meme_caption = ""
+if "meme_template" not in st.session_state:
+    st.session_state.meme_template = None
+if "session_key" not in st.session_state:
+    st.session_state.session_key = uuid.uuid4().hex
+if "roast_job_id" not in st.session_state:
+    # A refreshed tab gets a fresh session; the job id in the URL lets it reclaim its roast
+    st.session_state.roast_job_id = st.query_params.get("job")
+
+def warm_meme_assets():
+    # Decodes templates (flagging missing ones) and primes glyph metrics for the caption and story fonts
+    for template in load_meme_templates().values():
+        metrics_for(load_meme_font(max(24, int(template.size[0] / 12))))
+    for font in load_story_fonts():
+        metrics_for(font)
+
+def warm_gemini():
+    if not model_router:
+        return
+    model_router.warm()
+    get_prompt_cache(model_router.primary("roast")).warm(build_roast_prompt_prefix(load_smu_lore()))
+
+@st.cache_resource
+def start_warmup():
+    # Runs once per process, on the first script run (see warmup.py --kick), without blocking it
+    steps = [
+        ("confessions_corpus", lambda: get_confessions_corpus("smu_broad_v2.csv")),
+        ("smu_lore", load_smu_lore),
+        ("keyword_taxonomy", load_keyword_taxonomy),
+        ("meme_templates_and_fonts", warm_meme_assets),
+        ("story_card_base", lambda: (load_story_fonts(), get_story_card_base())),
+        ("leaderboard_rollups", get_leaderboard_rollups),
+        ("leaderboard_writer", get_leaderboard_writer),
+        ("worker_pools", lambda: (get_roast_pool(), get_session_manager())),
+        ("gemini_client", warm_gemini),
+    ]
+    return WarmupRunner(steps, readiness_file=READINESS_FILE).start()
+
+warmup_runner = start_warmup()
 
 
 # ==========================================
@@ -546,9 +834,47 @@ st.divider()
 
 main_tab, board_tab = st.tabs(["🧪 Roast Analyzer", "🏆 SMU Hall of Shame"])
 
+@st.fragment(run_every=ROAST_POLL_SECONDS)
+def roast_job_status():
+    # Only this block re-runs while the job waits; the full app re-runs once, when it's finished
+    roast_pool = get_roast_pool()
+    job = roast_pool.get(st.session_state.roast_job_id)
+    if job is None or job.status not in ("queued", "running"):
+        st.rerun()
+    position = roast_pool.position(job.job_id)
+    if position:
+        st.info(f"📋 Your file is in the HR inbox. Position in queue: {position}")
+    else:
+        st.info("🔎 Accessing SMU Confessions database & analyzing synergies...")
+
+poll_roast_job = False
+
 with main_tab:
+    # --- PENDING ROAST JOB ---
+    if st.session_state.roast_job_id:
+        roast_pool = get_roast_pool()
+        job = roast_pool.get(st.session_state.roast_job_id)
+        if job is None:
+            st.session_state.roast_job_id = None
+            st.query_params.pop("job", None)
+        elif job.status in ("queued", "running"):
+            poll_roast_job = True
+            roast_job_status()
+        else:
+            st.session_state.roast_job_id = None
+            st.query_params.pop("job", None)
+            roast_pool.discard(job.job_id)
+            if job.status == "done":
+                try:
+                    apply_roast_result(job.result, job.meta)
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"🚨 Corporate Network Error: {str(e)}")
+            else:
+                st.error(f"🚨 Corporate Network Error: {job.error}")
+
     # --- INPUT SECTION ---
-    if not st.session_state.messages:
+    if not st.session_state.messages and not poll_roast_job:
 
         if not api_key:
             st.error("🚨 HR SYSTEM OFFLINE: No GEMINI_API_KEY found. Check Streamlit Secrets or your local .env file.")
@@ -640,106 +966,45 @@ with main_tab:
                     st.session_state.pronouns = pronouns
                     st.session_state.linkedin_post = ""
 
-                    if headshot_file is not None:
-                        st.session_state.last_headshot_bytes = headshot_file.getvalue()
+                    session_manager = get_session_manager()
+                    session_manager.drop_blobs(st.session_state.session_key)
+                    headshot_bytes = headshot_file.getvalue() if headshot_file is not None else None
+                    if headshot_bytes:
+                        st.session_state.headshot_digest = session_manager.put_blob(st.session_state.session_key, "headshot", headshot_bytes)
                     else:
-                        st.session_state.last_headshot_bytes = None
+                        st.session_state.headshot_digest = None
 
                     smu_lore = load_smu_lore()
-                    confessions_df = load_smu_confessions("smu_broad_v2.csv")
+                    confessions_df = get_confessions_corpus("smu_broad_v2.csv").search_df
                     dynamic_lore = get_dynamic_lore(confessions_df, faculty, candidate_text)
 
-                    initial_prompt = f"""
-                    You are a highly toxic, Gen Z corporate AI HR Manager evaluating a candidate from Singapore Management University (SMU).
-                    Your Persona: {roast_style}. Do not break character.
-                    Candidate's Pronouns: {pronouns}. You MUST use these pronouns.
-                    Candidate's Faculty: {faculty}.
+                    prompt_prefix = build_roast_prompt_prefix(smu_lore)
+                    suffix_parts = [build_roast_prompt_suffix(roast_style, pronouns, faculty, dynamic_lore, candidate_text)]
+                    if headshot_bytes:
+                        img = Image.open(io.BytesIO(headshot_bytes))
+                        suffix_parts.append(img)
+                        suffix_parts.append("\n\nCRITICAL: The candidate has also attached their headshot. Roast their choice of background, their smile (or lack thereof), and their general 'corporate aura'.")
 
-                    SMU LORE & STEREOTYPES:
-                    {smu_lore}
-                    
-                    LIVE CAMPUS INTEL (TELEGRAM CONFESSIONS):
-                    Here are actual, recent anonymous confessions from the SMU student body related to this candidate's vibe/faculty:
-                    {dynamic_lore}
-
-                    YOUR MISSION:
-                    Read the following candidate profile. Write a brutal, highly specific "Performance Review."
-                    TONE: Combine professional corporate jargon with biting Gen Z slang.
-                    
-                    CRITICAL INSTRUCTION: You MUST use the "LIVE CAMPUS INTEL" provided above to make the roast feel eerily realistic. Quote or reference the specific themes of those confessions.
-
-                    Format your review EXACTLY like this:
-
-                    **1. Executive Summary:** A scathing opening paragraph summarizing why this candidate's career is lowkey a flop.
-
-                    **2. Granular Synergies (or Lack Thereof):** Use bullet points to pick out at least 3 to 4 VERY SPECIFIC details from their resume. Tie their "achievements" to the toxic traits mentioned in the LIVE CAMPUS INTEL.
-
-                    **3. Action Items:** Provide one final passive-aggressive sentence on what their actual career trajectory looks like.
-
-                    **4. CRITICAL RULE:** At the very end of your response, you MUST add exactly these 8 lines on separate lines (Do not add any text after this):
-                    TOXICITY_SCORE: [insert number between 1 and 100]
-                    DELUSION_LEVEL: [insert number between 1 and 100]
-                    BUZZWORD_DENSITY: [insert number between 1 and 100]
-                    CORPORATE_SLAVERY_APTITUDE: [insert number between 1 and 100]
-                    ACTUAL_EMPLOYABILITY: [insert number between 1 and 100]
-                    DREAM_JOB: [predict their ideal fantasy career based on profile]
-                    ACTUAL_DESTINY: [predict their realistic fate in one sharp sentence]
-                    MEME_CAPTION: [write a hilarious, short 10-word meme caption summarizing their biggest red flag]
-
-                    Here is the candidate text to destroy: {candidate_text}
-                    """
-
-                    with st.spinner("Accessing SMU Confessions database & analyzing synergies..."):
-                        try:
-                            # --- GEMINI GENERATION LOGIC ---
-                            prompt_parts = [initial_prompt]
-                            
-                            if headshot_file:
-                                img = Image.open(io.BytesIO(st.session_state.last_headshot_bytes))
-                                prompt_parts.append(img)
-                                prompt_parts.append("\n\nCRITICAL: The candidate has also attached their headshot. Roast their choice of background, their smile (or lack thereof), and their general 'corporate aura'.")
-
-                            # Call Gemini API
-                            response = model.generate_content(prompt_parts)
-                            raw_roast = response.text
-
-                            st.session_state.current_score = get_score(r"TOXICITY_SCORE:\s*(\d+)", raw_roast)
-                            st.session_state.radar_scores = {
-                                "Delusion": get_score(r"DELUSION_LEVEL:\s*(\d+)", raw_roast),
-                                "Buzzwords": get_score(r"BUZZWORD_DENSITY:\s*(\d+)", raw_roast),
-                                "Slavery Aptitude": get_score(r"CORPORATE_SLAVERY_APTITUDE:\s*(\d+)", raw_roast),
-                                "Employability": get_score(r"ACTUAL_EMPLOYABILITY:\s*(\d+)", raw_roast),
-                            }
-                            st.session_state.dream_job = get_line_value(r"DREAM_JOB:\s*(.*)", raw_roast, "Corporate Unicorn")
-                            st.session_state.actual_destiny = get_line_value(r"ACTUAL_DESTINY:\s*(.*)", raw_roast, "Big 4 spreadsheet gladiator")
-                            st.session_state.meme_caption = get_line_value(r"MEME_CAPTION:\s*(.*)", raw_roast, "When you put Excel as a skill but can't do a VLOOKUP")
-
-                            clean_roast = clean_generated_roast(raw_roast)
-                            clean_roast = format_roast_with_scorecard(
-                                clean_roast=clean_roast,
-                                toxicity=st.session_state.current_score,
-                                radar_scores=st.session_state.radar_scores,
-                                dream_job=st.session_state.dream_job,
-                                actual_destiny=st.session_state.actual_destiny,
-                            )
-
-                            st.session_state.messages = [{"role": "assistant", "content": clean_roast}]
-
-                            entry = {
-                                "created_at": datetime.now().isoformat(),
+                    try:
+                        # Hand the Gemini call to the worker pool; this script run just polls for it
+                        job_id = get_roast_pool().submit(
+                            st.session_state.session_key,
+                            run_roast_job,
+                            model_router,
+                            prompt_prefix,
+                            suffix_parts,
+                            meta={
                                 "nickname": nickname.strip() if nickname.strip() else "Anonymous Warrior",
                                 "faculty": faculty,
-                                "toxicity": st.session_state.current_score,
-                                "delusion": st.session_state.radar_scores["Delusion"],
-                                "employability": st.session_state.radar_scores["Employability"],
-                                "actual_destiny": st.session_state.actual_destiny,
-                            }
-                            add_candidate_to_leaderboard(entry)
-
-                            st.rerun()
-
-                        except Exception as e:
-                            st.error(f"🚨 Corporate Network Error: {str(e)}")
+                                "roast_style": roast_style,
+                                "pronouns": pronouns,
+                            },
+                        )
+                        st.session_state.roast_job_id = job_id
+                        st.query_params["job"] = job_id
+                        st.rerun()
+                    except QueueFullError as e:
+                        st.warning(f"⏳ {e}")
 
     # --- CHAT & RESULTS INTERFACE ---
     if st.session_state.messages:
@@ -757,8 +1022,10 @@ with main_tab:
                 st.session_state.dream_job = "Unknown"
                 st.session_state.actual_destiny = "Unknown"
                 st.session_state.meme_caption = ""
-                st.session_state.last_headshot_bytes = None
+                st.session_state.meme_template = None
+                st.session_state.headshot_digest = None
                 st.session_state.resume_draft_text = ""
+                get_session_manager().drop_blobs(st.session_state.session_key)
                 st.rerun()
 
             score_val = st.session_state.get("current_score", 50)
@@ -778,15 +1045,33 @@ with main_tab:
             st.markdown("#### 📸 Post for Clout")
             st.caption("Export your roast to share on your Instagram Story.")
             
-            hs_file = io.BytesIO(st.session_state.last_headshot_bytes) if st.session_state.get("last_headshot_bytes") else None
+            story_mime, story_ext = export_mime_and_ext(STORY_EXPORT_FORMAT)
             
             try:
-                story_img = generate_story_card(hs_file, show_safe_overlay=False)
+                story_args = (
+                    st.session_state.get("current_score", 50),
+                    st.session_state.get("dream_job", "Unknown"),
+                    st.session_state.get("actual_destiny", "Unknown"),
+                    tuple((st.session_state.get("radar_scores") or {}).items()),
+                    st.session_state.messages[0]["content"][:420] + "...",
+                )
+                story_img = get_spilled_render(
+                    st.session_state.session_key,
+                    "story",
+                    (st.session_state.headshot_digest, story_args, STORY_EXPORT_FORMAT, STORY_EXPORT_MAX_BYTES),
+                    story_ext,
+                    lambda: render_story_card_bytes(
+                        get_session_manager().get_blob(st.session_state.session_key, "headshot") if st.session_state.headshot_digest else None,
+                        *story_args,
+                        fmt=STORY_EXPORT_FORMAT,
+                        max_bytes=STORY_EXPORT_MAX_BYTES,
+                    ),
+                )
                 st.download_button(
                     label="📱 Download Instagram Story Report",
                     data=story_img,
-                    file_name="SMU_HR_Story.png",
-                    mime="image/png",
+                    file_name=f"SMU_HR_Story.{story_ext}",
+                    mime=story_mime,
                     use_container_width=True,
                     type="primary"
                 )
@@ -818,16 +1103,22 @@ with main_tab:
                 st.markdown("### 🤡 Candidate Vibe Check")
                 if "meme_caption" in st.session_state and st.session_state.meme_caption:
                     
-                    chosen_template = random.choice(MEME_TEMPLATES)
-                    meme_img = generate_custom_meme(st.session_state.meme_caption, chosen_template)
+                    chosen_template = st.session_state.meme_template
+                    meme_bytes = get_spilled_render(
+                        st.session_state.session_key,
+                        "meme",
+                        (st.session_state.meme_caption, chosen_template, MEME_EXPORT_FORMAT, MEME_EXPORT_MAX_BYTES),
+                        export_mime_and_ext(MEME_EXPORT_FORMAT)[1],
+                        lambda: render_meme_bytes(st.session_state.meme_caption, chosen_template, MEME_EXPORT_FORMAT, MEME_EXPORT_MAX_BYTES),
+                    ) if chosen_template else None
                     
-                    if meme_img:
+                    if meme_bytes:
                         spacer1, img_col, spacer2 = st.columns([1, 2, 1])
                         
                         with img_col:
-                            st.image(meme_img, use_container_width=True, caption=f"Template: {chosen_template}")
+                            st.image(meme_bytes, use_container_width=True, caption=f"Template: {chosen_template}")
                     else:
-                        st.warning(f"⚠️ Action Required: Make sure '{chosen_template}' is saved in your project folder!")
+                        st.warning(f"⚠️ Action Required: Make sure the meme templates ({', '.join(MEME_TEMPLATES)}) are saved in your project folder!")
 
         st.divider()
         st.markdown("### 💬 Live Manager Evaluation")
@@ -842,7 +1133,7 @@ with main_tab:
                 try:
                     li_prompt = f"Based on this roast: '{st.session_state.messages[0]['content']}', write a highly satirical, buzzword-stuffed, cringey Gen Z LinkedIn post where the candidate is 'humbled' and 'grateful' for the toxic feedback. Make it exactly like the posts people make after getting rejected from McKinsey. Use hashtags like #GrowthMindset #SMU #AlwaysLearning."
                     
-                    response = model.generate_content(li_prompt)
+                    response = model_router.for_call("linkedin").generate_content(li_prompt)
                     st.session_state.linkedin_post = response.text
                 except Exception as e:
                     st.error(f"Error generating post: {e}")
@@ -858,6 +1149,7 @@ with main_tab:
             with st.chat_message("user"):
                 st.markdown(user_reply)
             st.session_state.messages.append({"role": "user", "content": user_reply})
+            st.session_state.messages = trim_chat_history(st.session_state.messages, MAX_CHAT_MESSAGES)
             
             with st.chat_message("assistant"):
                 with st.spinner("Drafting a passive-aggressive retort..."):
@@ -870,13 +1162,14 @@ with main_tab:
                         
                         convo_context += f"Candidate: {user_reply}\nHR Manager:"
                         
-                        response = model.generate_content(convo_context)
+                        response = model_router.for_call("chat").generate_content(convo_context)
                         reply_text = response.text
                         
                         st.markdown(reply_text)
                         
                         # Save responses
                         st.session_state.messages.append({"role": "assistant", "content": reply_text})
+                        st.session_state.messages = trim_chat_history(st.session_state.messages, MAX_CHAT_MESSAGES)
                     except Exception as e:
                         st.error(f"🚨 Communication breakdown: {str(e)}")
 
@@ -912,6 +1205,31 @@ with board_tab:
             hide_index=True
         )
         
+    # --- FACULTY RIVALRY ANALYTICS (served from rollups, not the raw CSV) ---
+    st.divider()
+    st.markdown("### 📊 Faculty Rivalry Analytics")
+    rollups = get_leaderboard_rollups()
+    range_mode = st.radio("Window:", ["Today", "All Time"], horizontal=True)
+    day_filter = {datetime.now().date().isoformat()} if range_mode == "Today" else None
+    faculty_stats = rollups.faculty_summary(days=day_filter)
+
+    if faculty_stats.empty:
+        st.info("No faculty stats yet. Someone has to go first.")
+    else:
+        faculty_stats.columns = [col.replace("_", " ").title() for col in faculty_stats.columns]
+        st.dataframe(faculty_stats, use_container_width=True, hide_index=True)
+
+        trend_df = rollups.daily_trend("delusion")
+        if trend_df["day"].nunique() > 1:
+            fig = px.line(trend_df, x="day", y="delusion_mean", color="faculty", markers=True)
+            fig.update_layout(
+                yaxis=dict(range=[0, 100], title="Mean Delusion"),
+                xaxis_title=None,
+                margin=dict(l=20, r=20, t=20, b=20),
+                height=320,
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
     st.divider()
     with st.expander("Admin Tools"):
         if st.button("🗑️ Clear Leaderboard Data"):
@@ -921,3 +1239,53 @@ with board_tab:
                 st.rerun()
             else:
                 st.error(msg)
+
+        st.markdown("**Leaderboard Writer**")
+        writer_stats = get_leaderboard_writer().stats()
+        lb_colA, lb_colB, lb_colC, lb_colD = st.columns(4)
+        lb_colA.metric("Queue Depth", writer_stats["queue_depth"])
+        lb_colB.metric("Entries Written", writer_stats["written"])
+        lb_colC.metric("Avg Flush", f"{writer_stats['avg_flush_ms']} ms" if writer_stats["avg_flush_ms"] is not None else "—")
+        lb_colD.metric("Max Flush", f"{writer_stats['max_flush_ms']} ms")
+        if writer_stats["errors"]:
+            st.caption(f"⚠️ {writer_stats['errors']} failed flush(es), retrying. Last error: {writer_stats['last_error']}")
+
+        st.markdown("**Session Memory Report**")
+        session_manager = get_session_manager()
+        memory_rows = session_manager.report()
+        if memory_rows:
+            memory_df = pd.DataFrame(memory_rows)
+            mem_colA, mem_colB, mem_colC = st.columns(3)
+            mem_colA.metric("Tracked Sessions", len(memory_df))
+            mem_colB.metric("Session State", f"{memory_df['state_kb'].sum() / 1024:.1f} MB")
+            mem_colC.metric("Spilled to Disk", f"{memory_df['disk_kb'].sum() / 1024:.1f} MB")
+            st.dataframe(memory_df, use_container_width=True, hide_index=True)
+        if st.button("🧹 Evict Idle Sessions"):
+            st.success(f"Evicted {session_manager.evict_idle()} idle session(s).")
+
+        st.markdown("**Warm-up**")
+        warmup_status = warmup_runner.status()
+        st.caption(f"{'✅ Ready' if warmup_status['ready'] else '⏳ Warming up'} | total {warmup_status['total_s']}s")
+        if warmup_status["components"]:
+            st.dataframe(
+                pd.DataFrame([
+                    {"component": name, "seconds": secs, "error": warmup_status["errors"].get(name, "")}
+                    for name, secs in warmup_status["components"].items()
+                ]),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        if model_router:
+            st.markdown("**Model Routing**")
+            st.caption(" | ".join(f"{call_type}: {' > '.join(route['models'])}" for call_type, route in model_router.routes.items()))
+            router_stats = model_router.stats()
+            if router_stats:
+                st.dataframe(
+                    pd.DataFrame([{"model": name, **stats} for name, stats in router_stats.items()]),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
+# --- SESSION MEMORY ACCOUNTING ---
+get_session_manager().track(st.session_state.session_key, st.session_state.items())
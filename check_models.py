@@ -1,14 +1,128 @@
-import google.generativeai as genai
+import argparse
+import json
 import os
+import statistics
+import time
+
 from dotenv import load_dotenv
 
-# Load your API key
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from model_router import DEFAULT_ROUTES
+
+# Probe prompts roughly shaped like each call type the app makes
+PROBES = {
+    "chat": "You are a toxic HR manager. Candidate: 'My GPA is actually fine.' Reply in one short sentence.",
+    "linkedin": "Write a 120-word satirical LinkedIn post about being humbled by HR feedback. #GrowthMindset #SMU",
+    "roast": "Write a 300-word corporate performance review roasting an SMU finance student who lists Excel as a skill, "
+             "then end with the line TOXICITY_SCORE: <1-100>.",
+}
+
+# Call types where output quality matters more than speed keep their preferred model first
+QUALITY_FIRST = {"roast", "resume"}
+
+
+def list_live_models():
+    import google.generativeai as genai
+
+    print("🔍 Asking Google for available models...")
+    names = []
+    for m in genai.list_models():
+        if 'generateContent' in m.supported_generation_methods:
+            print(f"✅ Use this exact name: {m.name}")
+            names.append(m.name.replace("models/", ""))
+    return names
+
+
+def make_model(name, use_stub):
+    if use_stub:
+        from fake_gemini import FakeGenerativeModel
+        return FakeGenerativeModel.from_env(name)
+    import google.generativeai as genai
+    return genai.GenerativeModel(name)
+
+
+def probe_model(name, samples, use_stub, timeout):
+    model = make_model(name, use_stub)
+    latencies = []
+    output_chars = 0
+    failures = 0
+    for _ in range(samples):
+        for prompt in PROBES.values():
+            started = time.perf_counter()
+            try:
+                response = model.generate_content(prompt, request_options={"timeout": timeout})
+                output_chars += len(response.text or "")
+            except Exception as e:
+                failures += 1
+                print(f"   ⚠️ {name}: {e}")
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    attempts = samples * len(PROBES)
+    ordered = sorted(latencies)
+    return {
+        "model": name,
+        "success_rate": round(len(latencies) / attempts, 3) if attempts else 0.0,
+        "p50_s": round(statistics.median(ordered), 3) if ordered else None,
+        "p95_s": round(ordered[int(0.95 * (len(ordered) - 1))], 3) if ordered else None,
+        "chars_per_s": round(output_chars / sum(latencies), 1) if latencies else 0.0,
+    }
+
+
+def build_routes(results, min_success):
+    usable = [r for r in results if r["p50_s"] is not None and r["success_rate"] >= min_success]
+    fastest = [r["model"] for r in sorted(usable, key=lambda r: r["p50_s"])]
+    usable_names = set(fastest)
+
+    routes = {}
+    for call_type, default in DEFAULT_ROUTES.items():
+        if call_type in QUALITY_FIRST:
+            preferred = [m for m in default["models"] if m in usable_names]
+            order = preferred + [m for m in fastest if m not in preferred]
+        else:
+            order = fastest
+        routes[call_type] = {"models": order[:3] or default["models"], "timeout": default["timeout"]}
+    return routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe Gemini models and write a routing config for app.py.")
+    parser.add_argument("--models", default="", help="comma-separated model names (default: all available / route defaults)")
+    parser.add_argument("--samples", type=int, default=3, help="probe rounds per model")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--min-success", type=float, default=0.8, help="drop models below this success rate")
+    parser.add_argument("--stub", action="store_true", help="probe fake_gemini instead of the live API")
+    parser.add_argument("--list-only", action="store_true", help="just print the available model names")
+    parser.add_argument("--out", default="model_routing.json")
+    args = parser.parse_args()
+
+    candidates = [m.strip() for m in args.models.split(",") if m.strip()]
+    if not args.stub:
+        import google.generativeai as genai
+
+        # Load your API key
+        load_dotenv()
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        available = list_live_models()
+        if args.list_only:
+            return
+        candidates = candidates or [m for m in available if "gemini" in m]
+    candidates = candidates or sorted({m for route in DEFAULT_ROUTES.values() for m in route["models"]})
+
+    results = []
+    for name in candidates:
+        print(f"⏱️ Probing {name}...")
+        result = probe_model(name, args.samples, args.stub, args.timeout)
+        print(f"   p50 {result['p50_s']}s | p95 {result['p95_s']}s | {result['chars_per_s']} chars/s | ok {result['success_rate']:.0%}")
+        results.append(result)
+
+    routes = build_routes(results, args.min_success)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "probes": results, "routes": routes}, f, indent=2)
+
+    print(f"\n📝 Routing config written to {args.out}")
+    for call_type, route in routes.items():
+        print(f"   {call_type:<9} -> {' > '.join(route['models'])}")
 
-print("🔍 Asking Google for available models...")
 
-# Loop through and print every model your key can use for text generation
-for m in genai.list_models():
-    if 'generateContent' in m.supported_generation_methods:
-        print(f"✅ Use this exact name: {m.name}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
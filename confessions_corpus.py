@@ -0,0 +1,116 @@
+# confessions_corpus.py
+# Keeps smu_broad_v2.csv in memory and picks up appended confessions without re-parsing the file.
+# A watcher thread polls size/mtime, parses only the new tail, and swaps in fresh frames
+# copy-on-write, so readers mid-request keep using the snapshot they already hold.
+
+import io
+import os
+import threading
+
+import pandas as pd
+
+SEARCH_QUALITY_FLAGS = ["high", "medium"]
+
+
+def build_search_frame(df):
+    # The retrieval view get_dynamic_lore searches: quality-filtered rows with pre-lowered text
+    if df.empty or "cleaned_text" not in df.columns:
+        return pd.DataFrame(columns=list(df.columns) + ["search_text"])
+    if "quality_flag" in df.columns:
+        df = df[df["quality_flag"].isin(SEARCH_QUALITY_FLAGS)]
+    df = df.copy()
+    df["search_text"] = df["cleaned_text"].astype(str).str.lower()
+    return df
+
+
+class ConfessionsCorpus:
+    def __init__(self, filepath, poll_seconds=30):
+        self.filepath = filepath
+        self.poll_seconds = poll_seconds
+        self._refresh_lock = threading.Lock()
+        self._header = ""
+        self._offset = 0
+        self._mtime = None
+        self.df = pd.DataFrame()
+        self.search_df = build_search_frame(self.df)
+        self._full_reload()
+        if poll_seconds:
+            threading.Thread(target=self._watch, name="corpus-watcher", daemon=True).start()
+
+    def refresh(self):
+        # Returns the number of rows ingested; only one refresh runs at a time
+        with self._refresh_lock:
+            try:
+                stat = os.stat(self.filepath)
+            except FileNotFoundError:
+                return 0
+            if stat.st_size == self._offset and stat.st_mtime == self._mtime:
+                return 0
+            if stat.st_size < self._offset or not self._header:
+                # Truncated or rewritten: nothing incremental to do
+                return self._full_reload()
+            return self._ingest_tail(stat)
+
+    def _full_reload(self):
+        try:
+            with open(self.filepath, "rb") as f:
+                raw = f.read()
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return 0
+        header_end = raw.find(b"\n") + 1
+        complete_end = raw.rfind(b"\n") + 1
+        try:
+            df = pd.read_csv(io.BytesIO(raw[:complete_end]))
+        except Exception as e:
+            print(f"Confessions file error: {e}")
+            return 0
+        self._header = raw[:header_end].decode("utf-8")
+        self._offset = complete_end
+        self._mtime = stat.st_mtime
+        self._publish(df)
+        return len(df)
+
+    def _ingest_tail(self, stat):
+        with open(self.filepath, "rb") as f:
+            f.seek(self._offset)
+            tail = f.read(stat.st_size - self._offset)
+        # Only consume whole lines; a half-written row is picked up on the next poll
+        complete_end = tail.rfind(b"\n") + 1
+        if not complete_end:
+            return 0
+        try:
+            new_rows = pd.read_csv(io.StringIO(self._header + tail[:complete_end].decode("utf-8")))
+        except Exception as e:
+            # Most likely a quoted multi-line field cut mid-write; retry on the next poll
+            print(f"Confessions tail not parseable yet: {e}")
+            return 0
+
+        # No id filtering: the byte offset already reads each row once, and a fresh load keeps
+        # every row too (the ingester may append ids lower than the current max)
+        self._offset += complete_end
+        self._mtime = stat.st_mtime
+        if new_rows.empty:
+            return 0
+
+        df = pd.concat([self.df, new_rows], ignore_index=True)
+        search_df = pd.concat([self.search_df, build_search_frame(new_rows)], ignore_index=True)
+        self._publish(df, search_df)
+        return len(new_rows)
+
+    def _publish(self, df, search_df=None):
+        if search_df is None:
+            search_df = build_search_frame(df)
+        # Plain attribute rebinds: frames already handed to a request are never mutated
+        self.search_df = search_df
+        self.df = df
+
+    def _watch(self):
+        stop = threading.Event()
+        while not stop.wait(self.poll_seconds):
+            try:
+                added = self.refresh()
+                if added:
+                    print(f"Confessions corpus: ingested {added} new rows")
+            except Exception as e:
+                print(f"Confessions watcher error: {e}")
@@ -0,0 +1,131 @@
+# fake_gemini.py
+# Local stand-in for genai.GenerativeModel so the app can run offline / under load tests.
+# Enable in app.py with FAKE_GEMINI=1; tune with FAKE_GEMINI_LATENCY and FAKE_GEMINI_ERROR_RATE.
+
+import os
+import random
+import threading
+import time
+
+# Process-wide counters, so a load test can read totals without reaching into the app
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "errors": 0, "input_chars": 0, "cached_chars": 0, "cache_creates": 0}
+
+
+class FakeGeminiError(RuntimeError):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name="fake-gemini", latency=0.5, jitter=0.25, error_rate=0.0, seed=None, cached_prefix=""):
+        self.model_name = model_name
+        self.cached_prefix = cached_prefix
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model_name="fake-gemini"):
+        return cls(
+            model_name=model_name,
+            latency=float(os.getenv("FAKE_GEMINI_LATENCY", "0.5")),
+            jitter=float(os.getenv("FAKE_GEMINI_JITTER", "0.25")),
+            error_rate=float(os.getenv("FAKE_GEMINI_ERROR_RATE", "0")),
+        )
+
+    def generate_content(self, contents, **kwargs):
+        parts = contents if isinstance(contents, list) else [contents]
+        prompt = "\n".join(p for p in parts if isinstance(p, str))
+
+        with _stats_lock:
+            _stats["calls"] += 1
+            _stats["input_chars"] += len(prompt)
+            _stats["cached_chars"] += len(self.cached_prefix)
+        prompt = self.cached_prefix + prompt
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+            scores = [self._rng.randint(1, 100) for _ in range(5)]
+
+        timeout = (kwargs.get("request_options") or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            with _stats_lock:
+                _stats["errors"] += 1
+            raise FakeGeminiError("504 Deadline Exceeded (fake)")
+
+        time.sleep(delay)
+        if fail:
+            with _stats_lock:
+                _stats["errors"] += 1
+            raise FakeGeminiError("429 Resource has been exhausted (fake)")
+
+        if "TOXICITY_SCORE" in prompt:
+            return FakeResponse(fake_roast_text(scores))
+        if "LinkedIn post" in prompt:
+            return FakeResponse("Humbled to share that HR has rejected me. #GrowthMindset #SMU #AlwaysLearning")
+        return FakeResponse("Noted. Circling back: still unemployable.")
+
+
+class FakeCacheBackend:
+    # Mirrors prompt_cache.GeminiCacheBackend; cached prefix chars are counted apart from billed input
+    def __init__(self, base_model, min_chars=0):
+        self.base_model = base_model
+        self.min_chars = min_chars
+
+    def create(self, prefix, ttl_seconds):
+        if len(prefix) < self.min_chars:
+            raise FakeGeminiError("400 Cached content is too small (fake)")
+        with _stats_lock:
+            _stats["cache_creates"] += 1
+        return {"prefix": prefix, "ttl": ttl_seconds}
+
+    def bind(self, handle):
+        m = self.base_model
+        return FakeGenerativeModel(
+            model_name=m.model_name,
+            latency=m.latency,
+            jitter=m.jitter,
+            error_rate=m.error_rate,
+            cached_prefix=handle["prefix"],
+        )
+
+    def delete(self, handle):
+        pass
+
+    def is_gone(self, error):
+        return str(error).startswith("404")
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def fake_roast_text(scores):
+    toxicity, delusion, buzzwords, slavery, employability = scores
+    return f"""**1. Executive Summary:** A casing-competition finalist with the strategic depth of a failed eBOSS bid.
+
+**2. Granular Synergies (or Lack Thereof):**
+- "Proficient in Excel" — confirmed VLOOKUP-curious.
+- Three CCA exco roles, zero measurable outcomes.
+- Class Part champion, airtime-to-substance ratio still pending.
+
+**3. Action Items:** Please circle back once you have a personality.
+
+TOXICITY_SCORE: {toxicity}
+DELUSION_LEVEL: {delusion}
+BUZZWORD_DENSITY: {buzzwords}
+CORPORATE_SLAVERY_APTITUDE: {slavery}
+ACTUAL_EMPLOYABILITY: {employability}
+DREAM_JOB: Managing Director at Goldman Sachs
+ACTUAL_DESTINY: Camping in a Connexion GSR updating the same pitch deck.
+MEME_CAPTION: When your resume says leadership but your group said otherwise
+"""
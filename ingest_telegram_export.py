@@ -0,0 +1,330 @@
+# ingest_telegram_export.py
+# Builds the confessions corpus from a Telegram channel export (messages.html, messages2.html, ...).
+# Each file is streamed through an incremental HTML parser in fixed-size chunks, so only the
+# messages seen since the last chunk are ever held in memory. Cleaning, tagging and quality
+# scoring run in a process pool; results go to the SQLite `confessions` table that
+# export_broad_to_jsonl.py reads and are appended to smu_broad_v2.csv for the app.
+#
+#   python ingest_telegram_export.py "ChatExport_2025-08-30" --db smu_student_life.db
+#
+# Re-running is safe: ids already in the CSV/DB are skipped, so a newer export only adds the tail.
+
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from html.parser import HTMLParser
+
+CSV_COLUMNS = ["file", "id", "date", "from", "text", "photo", "cleaned_text", "is_smu", "word_count", "auto_tags", "quality_flag"]
+READ_CHUNK_BYTES = 64 * 1024
+
+# Substring matches on lower-cased cleaned text, same as the original notebook pass
+SMU_KEYWORDS = [
+    "smu", "prof", "scis", "lkcsb", "yphsl", "sol", "lky", "boss", "bidding", "bell curve", "freshie",
+    "vivace", "cca", "csp", "ori", "loa", "exchange", "gpa", "mpw", "internship", "ta", "econs",
+    "finance", "tutoring", "y1s1", "group project",
+]
+TAG_KEYWORDS = {
+    "bidding_modules": ["mod", "bidding", "basket", "econs", "finance", "overbid", "snipe"],
+    "cca_campus": ["cca", "ori", "vivace", "orientation", "tutoring"],
+    "csp": ["csp"],
+    "exchange": ["exchange", "loa"],
+    "grades": ["gpa", "finals", "mpw", "bell curve", "moderation", "retest"],
+    "group_project": ["groupmate", "group project"],
+    "internship": ["internship", "job", "networking", "nepo"],
+    "social_dating": ["crush", "dating", "date", "friends", "lowkey", "attached", "ta"],
+    "student_stress": ["stress", "anxious", "cope", "burnout"],
+}
+
+CONFESSION_ID_RE = re.compile(r"Confession ID:\s*#C\d+\s*---\s*", re.IGNORECASE)
+POST_FOOTER_RE = re.compile(r"\s*---\s*Post Confession.*$", re.IGNORECASE)
+FILE_NUMBER_RE = re.compile(r"messages(\d*)\.html$")
+
+
+class TelegramExportParser(HTMLParser):
+    # Collects one record per <div class="message default ..."> as the closing tag streams past
+    def __init__(self, filename):
+        super().__init__(convert_charrefs=True)
+        self.filename = filename
+        self.records = []
+        self._last_from = ""
+        self._depth = 0
+        self._message_depth = None
+        self._capture = None  # ("text" | "from", depth it closes at)
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "br" and self._capture and self._capture[0] == "text":
+            self._current["text"].append(" ")
+            return
+        if tag == "a" and self._current is not None:
+            attrs = dict(attrs)
+            if "photo_wrap" in (attrs.get("class") or "") and attrs.get("href"):
+                self._current["photo"] = attrs["href"]
+            return
+        if tag != "div":
+            return
+
+        self._depth += 1
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if self._current is None:
+            if "message" in classes and "default" in classes:
+                message_id = (attrs.get("id") or "").replace("message", "")
+                self._current = {
+                    "id": int(message_id) if message_id.lstrip("-").isdigit() else None,
+                    "from": [],
+                    "text": [],
+                    "date": "",
+                    "photo": "",
+                }
+                self._message_depth = self._depth
+            return
+
+        if "from_name" in classes and self._capture is None:
+            self._capture = ("from", self._depth)
+        elif "text" in classes and self._capture is None:
+            self._capture = ("text", self._depth)
+        elif "date" in classes and attrs.get("title"):
+            self._current["date"] = attrs["title"]
+
+    def handle_endtag(self, tag):
+        if tag != "div":
+            return
+        if self._capture and self._capture[1] == self._depth:
+            self._capture = None
+        if self._current is not None and self._depth == self._message_depth:
+            self._finish_message()
+        self._depth -= 1
+
+    def handle_data(self, data):
+        if self._capture:
+            self._current[self._capture[0]].append(data)
+
+    def _finish_message(self):
+        message, self._current, self._message_depth = self._current, None, None
+        # "Joined" messages omit the sender and continue the previous one
+        sender = " ".join("".join(message["from"]).split()) or self._last_from
+        self._last_from = sender
+        text = " ".join("".join(message["text"]).split())
+        if message["id"] is None or not text:
+            return
+        self.records.append({
+            "file": self.filename,
+            "id": message["id"],
+            "date": message["date"],
+            "from": sender,
+            "text": text,
+            "photo": message["photo"],
+        })
+
+
+def iter_export_records(path):
+    parser = TelegramExportParser(os.path.basename(path))
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            if parser.records:
+                yield from parser.records
+                parser.records = []
+    parser.close()
+    yield from parser.records
+
+
+def export_files(paths):
+    # Telegram numbers the pages messages.html, messages2.html, ... messages14.html
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "messages*.html")))
+        else:
+            files.append(path)
+
+    def page_number(path):
+        match = FILE_NUMBER_RE.search(os.path.basename(path))
+        return int(match.group(1) or 1) if match else 0
+
+    return sorted(files, key=lambda p: (os.path.dirname(p), page_number(p)))
+
+
+def clean_text(text):
+    text = CONFESSION_ID_RE.sub("", text)
+    text = POST_FOOTER_RE.sub("", text)
+    return " ".join(text.split())
+
+
+def enrich_batch(batch, min_words):
+    # Runs in a worker process; pure function of the raw records
+    rows = []
+    for record in batch:
+        cleaned = clean_text(record["text"])
+        word_count = len(cleaned.split())
+        if word_count < min_words:
+            continue
+        lowered = cleaned.lower()
+        tags = [tag for tag, keywords in TAG_KEYWORDS.items() if any(k in lowered for k in keywords)]
+        auto_tags = ",".join(tags) if tags else "general"
+        if auto_tags == "general" and word_count < 25:
+            quality_flag = "low"
+        elif auto_tags != "general" and word_count >= 50:
+            quality_flag = "high"
+        else:
+            quality_flag = "medium"
+        rows.append({
+            **record,
+            "cleaned_text": cleaned,
+            "is_smu": any(k in lowered for k in SMU_KEYWORDS),
+            "word_count": word_count,
+            "auto_tags": auto_tags,
+            "quality_flag": quality_flag,
+        })
+    return rows
+
+
+def iter_batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def open_db(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS confessions (
+            file TEXT, id INTEGER PRIMARY KEY, date TEXT, "from" TEXT, text TEXT, photo TEXT,
+            cleaned_text TEXT, is_smu INTEGER, word_count INTEGER, auto_tags TEXT, quality_flag TEXT
+        )
+        """
+    )
+    return conn
+
+
+def existing_db_ids(conn):
+    return {row[0] for row in conn.execute("SELECT id FROM confessions")}
+
+
+def existing_csv_ids(csv_path):
+    if not os.path.exists(csv_path):
+        return set()
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        return {int(row["id"]) for row in csv.DictReader(f) if row.get("id", "").isdigit()}
+
+
+def write_rows(rows, conn, db_ids, csv_writer, csv_file, csv_ids):
+    # The DB and CSV are deduped separately: either may already hold ids the other lacks
+    db_added = csv_added = 0
+    if conn is not None:
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO confessions (file, id, date, "from", text, photo, cleaned_text, is_smu, '
+            "word_count, auto_tags, quality_flag) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [tuple(int(r[c]) if c == "is_smu" else r[c] for c in CSV_COLUMNS) for r in rows],
+        )
+        conn.commit()
+        db_added = conn.total_changes - before
+        db_ids.update(row["id"] for row in rows)
+    if csv_writer is not None:
+        for row in rows:
+            if row["id"] in csv_ids:
+                continue
+            csv_ids.add(row["id"])
+            csv_writer.writerow(row)
+            csv_added += 1
+        # Whole rows only: the app's corpus watcher tails this file while we append
+        csv_file.flush()
+    return db_added, csv_added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a Telegram HTML export into the confessions DB and CSV.")
+    parser.add_argument("paths", nargs="+", help="export folders or messages*.html files")
+    parser.add_argument("--db", default="smu_student_life.db", help="SQLite DB read by export_broad_to_jsonl.py ('' to skip)")
+    parser.add_argument("--csv", default="smu_broad_v2.csv", help="corpus CSV the app reads ('' to skip)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--min-words", type=int, default=15, help="drop messages shorter than this after cleaning")
+    args = parser.parse_args()
+
+    files = export_files(args.paths)
+    if not files:
+        print("No messages*.html files found.")
+        return
+
+    conn = open_db(args.db) if args.db else None
+    db_ids = existing_db_ids(conn) if conn is not None else None
+    csv_ids = existing_csv_ids(args.csv) if args.csv else None
+    csv_file = csv_writer = None
+    if args.csv:
+        new_file = not os.path.exists(args.csv) or os.path.getsize(args.csv) == 0
+        csv_file = open(args.csv, "a", encoding="utf-8", newline="")
+        csv_writer = csv.DictWriter(csv_file, fieldnames=CSV_COLUMNS, lineterminator="\n")
+        if new_file:
+            csv_writer.writeheader()
+
+    started = time.perf_counter()
+    parsed = kept = db_added = csv_added = 0
+
+    def already_stored(record_id):
+        # Only skip enrichment when every enabled target already has the id
+        return all(record_id in ids for ids in (db_ids, csv_ids) if ids is not None)
+
+    def records():
+        nonlocal parsed
+        for path in files:
+            print(f"📄 Streaming {path}...")
+            for record in iter_export_records(path):
+                if already_stored(record["id"]):
+                    continue
+                parsed += 1
+                yield record
+
+    try:
+        with multiprocessing.Pool(max(1, args.workers)) as pool:
+            # Keep a bounded number of batches in flight so a huge export never piles up in memory;
+            # results are consumed in submission order, which keeps ids ascending in the CSV
+            in_flight = deque()
+            max_in_flight = max(1, args.workers) * 2
+            for batch in iter_batches(records(), args.batch_size):
+                in_flight.append(pool.apply_async(enrich_batch, (batch, args.min_words)))
+                if len(in_flight) >= max_in_flight:
+                    rows = in_flight.popleft().get()
+                    kept += len(rows)
+                    db_new, csv_new = write_rows(rows, conn, db_ids, csv_writer, csv_file, csv_ids)
+                    db_added += db_new
+                    csv_added += csv_new
+            while in_flight:
+                rows = in_flight.popleft().get()
+                kept += len(rows)
+                db_new, csv_new = write_rows(rows, conn, db_ids, csv_writer, csv_file, csv_ids)
+                db_added += db_new
+                csv_added += csv_new
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+        if conn is not None:
+            conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ {parsed:,} new messages parsed from {len(files)} file(s) in {elapsed:.1f}s")
+    print(f"   {kept:,} kept after cleaning (>= {args.min_words} words), {csv_added:,} appended to {args.csv or 'no CSV'}")
+    if args.db:
+        print(f"   SQLite: {args.db} (table 'confessions'), {db_added:,} rows inserted")
+
+
+if __name__ == "__main__":
+    main()
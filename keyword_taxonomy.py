@@ -0,0 +1,94 @@
+# keyword_taxonomy.py
+# Faculty -> confession keywords and resume signal -> lore tags, loaded from smu_taxonomy.json.
+# Resume signals are compiled into one Aho-Corasick automaton, so every term is matched against
+# the candidate text in a single linear pass however large the taxonomy grows.
+
+import json
+from collections import deque
+
+
+class AhoCorasick:
+    def __init__(self, terms):
+        # terms: iterable of (term, payload); terms are matched case-sensitively, so lower them first
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for term, payload in terms:
+            if term:
+                self._add(term, payload)
+        self._build_links()
+
+    def _add(self, term, payload):
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(term), payload))
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Inherit matches that end here via the suffix link
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text, whole_words=True):
+        # Yields (start, end, payload) for every term occurrence, in one pass over text
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if whole_words and (
+                    (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum())
+                ):
+                    continue
+                yield start, end, payload
+
+    @property
+    def size(self):
+        return len(self._goto)
+
+
+class KeywordTaxonomy:
+    def __init__(self, faculties=None, signals=None, default_lore=None):
+        # Everything is lower-cased here: keywords are searched against the corpus' lower-cased text
+        self.faculties = {name: [k.lower() for k in keywords] for name, keywords in (faculties or {}).items()}
+        self.signals = {term.lower(): [tag.lower() for tag in tags] for term, tags in (signals or {}).items()}
+        self.default_lore = [k.lower() for k in default_lore or []]
+        self.automaton = AhoCorasick(self.signals.items())
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("faculties"), data.get("signals"), data.get("default_lore"))
+
+    def match_signals(self, candidate_text):
+        # Resume signal term -> lore tags for every term present in the text
+        text = candidate_text.lower()
+        found = {}
+        for start, end, tags in self.automaton.iter_matches(text):
+            found.setdefault(text[start:end], tags)
+        return found
+
+    def lore_keywords(self, faculty, candidate_text):
+        keywords = list(self.faculties.get(faculty, []))
+        for tags in self.match_signals(candidate_text).values():
+            keywords.extend(tags)
+        # Ordered de-dupe keeps faculty terms first
+        return list(dict.fromkeys(keywords))
@@ -0,0 +1,176 @@
+# leaderboard_rollups.py
+# Per-day, per-faculty aggregates for the Hall of Shame, updated on every insert.
+# Scores are integers clamped to 1..100, so a 100-bucket histogram is an exact,
+# fixed-size, mergeable sketch for percentiles. Size grows with days x faculties,
+# never with the number of candidates roasted. Each day lives in its own file under
+# `path`, so a flush only copies and rewrites the days it touches.
+
+import copy
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+ROLLUP_METRICS = ["toxicity", "delusion", "employability"]
+
+
+def empty_bucket():
+    return {
+        "count": 0,
+        "metrics": {m: {"sum": 0, "max": 0, "hist": [0] * 100} for m in ROLLUP_METRICS},
+    }
+
+
+def merge_bucket(into, other):
+    into["count"] += other["count"]
+    for m in ROLLUP_METRICS:
+        a, b = into["metrics"][m], other["metrics"][m]
+        a["sum"] += b["sum"]
+        a["max"] = max(a["max"], b["max"])
+        a["hist"] = [x + y for x, y in zip(a["hist"], b["hist"])]
+    return into
+
+
+def day_key(entry):
+    return str(entry.get("created_at", ""))[:10] or "unknown"
+
+
+def apply_entry(days, entry):
+    faculty = entry.get("faculty") or "Unknown"
+    bucket = days.setdefault(day_key(entry), {}).setdefault(faculty, empty_bucket())
+    bucket["count"] += 1
+    for m in ROLLUP_METRICS:
+        try:
+            score = max(1, min(100, int(entry.get(m))))
+        except (TypeError, ValueError):
+            continue
+        stats = bucket["metrics"][m]
+        stats["sum"] += score
+        stats["max"] = max(stats["max"], score)
+        stats["hist"][score - 1] += 1
+
+
+def hist_percentile(hist, pct):
+    total = sum(hist)
+    if not total:
+        return None
+    rank = pct / 100 * total
+    seen = 0
+    for score, n in enumerate(hist, start=1):
+        seen += n
+        if seen >= rank:
+            return score
+    return 100
+
+
+class LeaderboardRollups:
+    def __init__(self, path):
+        self.path = path  # directory holding one <day>.json per day
+        self._lock = threading.Lock()
+        self._days = {}  # "YYYY-MM-DD" -> faculty -> bucket
+        self._batches = {}  # day -> id of the last batch applied to it
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    self._days[data["day"]] = data["faculties"]
+                    self._batches[data["day"]] = data.get("batch")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Rollup file {name} unreadable, skipping: {e}")
+
+    @property
+    def is_empty(self):
+        return not self._days
+
+    def add(self, entry):
+        self.add_many([entry])
+
+    def add_many(self, entries, batch_id=None):
+        # Only the touched days are copied and rewritten. Each day's copy replaces the live one
+        # once its file is on disk; with a batch_id, a retry after a partial failure skips the
+        # days that already took this batch, so nothing is counted twice
+        by_day = {}
+        for entry in entries:
+            by_day.setdefault(day_key(entry), []).append(entry)
+        with self._lock:
+            for day, day_entries in by_day.items():
+                if batch_id is not None and self._batches.get(day) == batch_id:
+                    continue
+                days = {day: copy.deepcopy(self._days.get(day, {}))}
+                for entry in day_entries:
+                    apply_entry(days, entry)
+                self._save(day, days[day], batch_id)
+                self._days[day] = days[day]
+                self._batches[day] = batch_id
+
+    def backfill(self, csv_path):
+        # One-off rebuild from the raw history; only needed when there are no day files yet
+        if not os.path.exists(csv_path):
+            return 0
+        df = pd.read_csv(csv_path)
+        self.add_many(df.to_dict("records"))
+        return len(df)
+
+    def clear(self):
+        with self._lock:
+            for day in self._days:
+                try:
+                    os.remove(self._day_path(day))
+                except FileNotFoundError:
+                    pass
+            self._days = {}
+            self._batches = {}
+
+    def faculty_summary(self, days=None):
+        # days=None means all time; otherwise an iterable of "YYYY-MM-DD" keys
+        with self._lock:
+            merged = {}
+            for day, faculties in self._days.items():
+                if days is not None and day not in days:
+                    continue
+                for faculty, bucket in faculties.items():
+                    merge_bucket(merged.setdefault(faculty, empty_bucket()), bucket)
+
+        rows = []
+        for faculty, bucket in merged.items():
+            row = {"faculty": faculty, "candidates": bucket["count"]}
+            for m in ROLLUP_METRICS:
+                stats = bucket["metrics"][m]
+                scored = sum(stats["hist"])
+                row[f"{m}_mean"] = round(stats["sum"] / scored, 1) if scored else None
+                row[f"{m}_max"] = stats["max"] if scored else None
+                row[f"{m}_p50"] = hist_percentile(stats["hist"], 50)
+                row[f"{m}_p90"] = hist_percentile(stats["hist"], 90)
+            rows.append(row)
+        return pd.DataFrame(rows).sort_values("candidates", ascending=False) if rows else pd.DataFrame()
+
+    def daily_trend(self, metric="delusion"):
+        with self._lock:
+            rows = []
+            for day, faculties in sorted(self._days.items()):
+                for faculty, bucket in faculties.items():
+                    stats = bucket["metrics"][metric]
+                    scored = sum(stats["hist"])
+                    rows.append({
+                        "day": day,
+                        "faculty": faculty,
+                        "candidates": bucket["count"],
+                        f"{metric}_mean": round(stats["sum"] / scored, 1) if scored else None,
+                    })
+        return pd.DataFrame(rows)
+
+    def _day_path(self, day):
+        return os.path.join(self.path, re.sub(r"[^0-9A-Za-z_-]", "_", day) + ".json")
+
+    def _save(self, day, faculties, batch_id):
+        os.makedirs(self.path, exist_ok=True)
+        day_path = self._day_path(day)
+        tmp_path = f"{day_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"day": day, "batch": batch_id, "faculties": faculties}, f)
+        os.replace(tmp_path, day_path)
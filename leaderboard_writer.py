@@ -0,0 +1,223 @@
+# leaderboard_writer.py
+# Write-behind persistence for Hall of Shame entries.
+# submit() only enqueues; a single writer thread appends batches to the CSV (no rewrite)
+# and folds them into the rollups, flushing when `batch_size` entries are waiting or the
+# oldest has waited `flush_interval` seconds. The CSV append and the rollup update are
+# retried separately, so a batch that reached the CSV is never appended (or counted) twice.
+# close() drains everything and is registered with atexit by app.py, so a clean shutdown
+# never drops queued entries.
+
+import csv
+import io
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+
+class LeaderboardWriter:
+    def __init__(self, csv_path, rollups=None, batch_size=20, flush_interval=2.0, retry_after=5.0):
+        self.csv_path = csv_path
+        self.rollups = rollups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_after = retry_after
+        self.io_lock = threading.Lock()  # held while a batch is on its way to disk
+        self._cond = threading.Condition()
+        self._pending = deque()  # (enqueued_at, entry)
+        self._in_flight = []  # batch being appended to the CSV
+        self._unrolled = []  # batch already in the CSV, waiting for the rollup update
+        self._batch_id = None  # lets the rollups skip days that already took _unrolled
+        self._flush_requested = False
+        self._closed = False
+        self._retry_at = 0.0
+        self._stats = {
+            "written": 0,
+            "flushes": 0,
+            "errors": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "last_error": "",
+        }
+        self._thread = threading.Thread(target=self._run, name="leaderboard-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Leaderboard writer is closed")
+            self._pending.append((time.time(), dict(entry)))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def pending_entries(self):
+        # Entries accepted but not yet in the CSV, so readers can show them straight away
+        with self._cond:
+            return list(self._in_flight) + [entry for _, entry in self._pending]
+
+    def snapshot(self):
+        # CSV text plus entries not yet in it, taken together under io_lock: a batch is either
+        # still pending or already (completely) in the file, never both or half-written
+        with self.io_lock:
+            try:
+                with open(self.csv_path, "r", encoding="utf-8", newline="") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                text = ""
+            return io.StringIO(text) if text else None, self.pending_entries()
+
+    def flush(self, timeout=10.0):
+        # Forces a write of everything queued so far; returns True once it is on disk
+        deadline = time.time() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._retry_at = 0.0
+            self._cond.notify()
+            while self._pending or self._in_flight or self._unrolled:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def discard_pending(self):
+        # Caller must hold io_lock so no batch is mid-write. A batch the writer has already taken
+        # but not yet written is dropped too; the writer re-checks it once it gets io_lock
+        with self._cond:
+            dropped = len(self._pending) + len(self._in_flight)
+            self._pending.clear()
+            self._in_flight = []
+            self._unrolled = []
+            self._cond.notify_all()
+            return dropped
+
+    def close(self, timeout=10.0):
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if not drained:
+            print(f"Leaderboard writer closed with {len(self._pending)} unwritten entries")
+        return drained
+
+    def stats(self):
+        with self._cond:
+            flushes = self._stats["flushes"]
+            oldest = self._pending[0][0] if self._pending else None
+            return {
+                "queue_depth": len(self._pending) + len(self._in_flight) + len(self._unrolled),
+                "oldest_wait_s": round(time.time() - oldest, 2) if oldest else 0.0,
+                "written": self._stats["written"],
+                "flushes": flushes,
+                "avg_flush_ms": round(self._stats["total_flush_ms"] / flushes, 1) if flushes else None,
+                "last_flush_ms": self._stats["last_flush_ms"],
+                "max_flush_ms": round(self._stats["max_flush_ms"], 1),
+                "errors": self._stats["errors"],
+                "last_error": self._stats["last_error"],
+            }
+
+    def _due(self, now):
+        if now < self._retry_at:
+            return False
+        if self._unrolled:
+            return True
+        if not self._pending:
+            return False
+        return (
+            self._flush_requested
+            or self._closed
+            or len(self._pending) >= self.batch_size
+            or now - self._pending[0][0] >= self.flush_interval
+        )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due(time.time()):
+                    if self._closed and not self._pending and not self._unrolled:
+                        return
+                    if self._pending or self._unrolled:
+                        wake_at = self._pending[0][0] + self.flush_interval if self._pending else 0.0
+                        self._cond.wait(max(0.05, max(wake_at, self._retry_at) - time.time()))
+                    else:
+                        self._flush_requested = False
+                        self._cond.wait()
+                # A batch whose rollup update failed is finished before a new one is taken
+                queued = []
+                if not self._unrolled:
+                    queued = list(self._pending)
+                    self._pending.clear()
+                self._in_flight = [entry for _, entry in queued]
+
+            started = time.perf_counter()
+            try:
+                with self.io_lock:
+                    # Re-read under io_lock: discard_pending may have dropped the batch meanwhile
+                    with self._cond:
+                        batch = self._in_flight
+                    if batch:
+                        self._append(batch)
+                        # Hand over under io_lock so snapshot() never sees the batch twice
+                        with self._cond:
+                            self._stats["written"] += len(batch)
+                            self._unrolled, self._in_flight = batch, []
+                            self._batch_id = uuid.uuid4().hex
+                    with self._cond:
+                        batch, batch_id = self._unrolled, self._batch_id
+                    if self.rollups is not None and batch:
+                        # A day is only applied once its file is saved, and never twice per batch_id
+                        self.rollups.add_many(batch, batch_id=batch_id)
+            except Exception as e:
+                print(f"Leaderboard flush failed, will retry: {e}")
+                with self._cond:
+                    if self._in_flight:
+                        # Nothing reached the CSV; put the batch back in front so ordering survives
+                        self._pending.extendleft(reversed(queued))
+                        self._in_flight = []
+                    self._retry_at = time.time() + self.retry_after
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = str(e)
+                    if self._closed:
+                        return
+                    self._cond.notify_all()
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._cond:
+                self._unrolled = []
+                self._stats["flushes"] += 1
+                self._stats["last_flush_ms"] = round(elapsed_ms, 1)
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+                self._stats["total_flush_ms"] += elapsed_ms
+                if not self._pending:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+    def _append(self, entries):
+        columns = self._header()
+        new_file = columns is None
+        if new_file:
+            columns = list(dict.fromkeys(key for entry in entries for key in entry))
+        with open(self.csv_path, "a", encoding="utf-8", newline="") as f:
+            size = f.tell()
+            try:
+                writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(entries)
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception:
+                # Roll back a partial append so the retry doesn't leave a torn or duplicate row
+                f.truncate(size)
+                raise
+
+    def _header(self):
+        try:
+            with open(self.csv_path, "r", encoding="utf-8", newline="") as f:
+                return next(csv.reader(f), None)
+        except FileNotFoundError:
+            return None
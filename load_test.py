@@ -0,0 +1,494 @@
+# load_test.py
+# Drives the real app.py with many simulated students against the fake Gemini stub, and
+# reports throughput, latency percentiles and memory growth.
+#
+# --mode server (default) starts `streamlit run app.py` and speaks the browser's websocket
+# protocol, one connection per student, so script runs, fragment polling and the worker pool
+# all run concurrently inside one replica, exactly as they would in production. The resume
+# PDF goes through the upload endpoint and st.file_uploader, like a real browser upload.
+# --mode apptest runs in-process via streamlit.testing AppTest. It is handy for debugging but
+# serialises every script run (see SCRIPT_LOCK), so its latencies include lock wait, and it
+# cannot upload files, so the PDF is parsed client-side and pasted as text.
+#
+# Usage:
+#   python load_test.py --users 5,20,50 --latency 0.8 --error-rate 0.05
+#   python load_test.py --url http://localhost:8501      # against a server you started yourself
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib import request
+
+import fitz
+
+import fake_gemini
+from warmup import kick_session
+
+RESUME_TEXT = """Alex Tan | alex.2026@smu.edu.sg
+BSc Information Systems, Singapore Management University (2027)
+- President, SMU Finance Club: led 40 members, organised 3 casing competitions
+- Dean's List AY2024, GPA 3.8
+- Skills: Python, SQL, Excel (VLOOKUP), PowerPoint, LeetCode 300+
+- Summer Analyst Intern, Big 4 audit firm
+"""
+
+SUBMISSION_RADIO = "What are we evaluating today?"
+PDF_OPTION = "📄 PDF Upload (Resume or LinkedIn Profile)"
+PDF_UPLOADER = "Upload PDF Document"
+PASTE_OPTION = "✍️ Paste LinkedIn Bio / Text"
+PASTE_AREA = "Paste your LinkedIn 'About' section, latest clout post, or raw resume text here:"
+ALIAS_INPUT = "Candidate Alias (for leaderboard)"
+SUBMIT_BUTTON = "Execute Performance Review"
+SORT_RADIO = "Sort By:"
+
+# AppTest swaps a process-global Runtime in and out around each script run, so two runs
+# cannot overlap. In apptest mode every script run is serialised here, including any model
+# call or sleep made inline by the script; numbers from that mode are lock-bound, not capacity.
+SCRIPT_LOCK = threading.Lock()
+
+
+def rss_mb(pid="self"):
+    # Current resident set size; falls back to our own peak RSS where /proc is unavailable
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_resume_pdf():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), RESUME_TEXT, fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def resume_text_from_pdf(pdf_bytes, rec):
+    # apptest mode only: AppTest can't upload files, so the PDF step parses the same way the
+    # app does and feeds the extracted text through the paste path.
+    t0 = time.perf_counter()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        candidate_text = "".join(page.get_text() for page in doc)
+    rec.time("pdf_parse", time.perf_counter() - t0)
+    return candidate_text
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.outcomes = {}
+
+    def time(self, step, seconds):
+        with self._lock:
+            self.timings.setdefault(step, []).append(seconds)
+
+    def count(self, outcome):
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+
+# --- server mode: real sessions over the websocket ---
+
+class ServerSession:
+    """Minimal browser stand-in: keeps widget values, sends reruns, and fires fragment timers."""
+
+    WIDGET_KINDS = ("radio", "selectbox", "text_input", "text_area", "button", "chat_input", "file_uploader")
+
+    def __init__(self, ws, base_url, timeout):
+        self.ws = ws
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session_id = ""
+        self.values = {}  # widget id -> WidgetState sent on every rerun, like the frontend does
+        self.widgets = {}  # label -> widget id, from the latest full run
+        self.alerts = []
+        self.chat_messages = 0
+        self.exceptions = []
+        self.fragments = {}  # fragment id -> auto-rerun interval
+
+    async def run(self, triggers=(), fragment_id=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(list(self.values.values()) + list(triggers))
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        else:
+            self._reset_view()
+        await self.ws.send(msg.SerializeToString())
+        await self._read_until_finished()
+
+    async def _read_until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        deadline = time.time() + self.timeout
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), timeout=max(0.1, deadline - time.time()))
+            fwd = ForwardMsg.FromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.session_id = fwd.new_session.initialize.session_id
+            elif kind == "delta":
+                self._on_delta(fwd.delta)
+            elif kind == "auto_rerun":
+                self.fragments[fwd.auto_rerun.fragment_id] = fwd.auto_rerun.interval
+            elif kind == "stop_auto_rerun":
+                for fragment_id in fwd.stop_auto_rerun.fragment_ids:
+                    self.fragments.pop(fragment_id, None)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    # The script called st.rerun(); the server starts the next full run by itself
+                    self._reset_view()
+                    continue
+                return fwd.script_finished
+
+    def _reset_view(self):
+        self.widgets = {}
+        self.alerts = []
+        self.chat_messages = 0
+        self.exceptions = []
+
+    def _on_delta(self, delta):
+        which = delta.WhichOneof("type")
+        if which == "add_block" and delta.add_block.WhichOneof("type") == "chat_message":
+            self.chat_messages += 1
+        if which != "new_element":
+            return
+        element = delta.new_element
+        element_kind = element.WhichOneof("type")
+        if element_kind == "alert":
+            self.alerts.append(element.alert.body)
+        elif element_kind == "exception":
+            self.exceptions.append(element.exception.message)
+        elif element_kind in self.WIDGET_KINDS:
+            widget = getattr(element, element_kind)
+            self.widgets[getattr(widget, "label", "") or element_kind] = widget.id
+
+    def set_string(self, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=self.widgets[label], string_value=value)
+        self.values[state.id] = state
+
+    def trigger(self, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return WidgetState(id=self.widgets[label], trigger_value=True)
+
+    async def upload(self, label, file_name, data, content_type):
+        # Same three steps as the browser: ask the session for an upload URL, PUT the file to
+        # /_stcore/upload_file, then point the uploader widget's state at it
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.Common_pb2 import FileURLs, UploadedFileInfo
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        msg = BackMsg()
+        msg.file_urls_request.request_id = uuid.uuid4().hex
+        msg.file_urls_request.file_names.append(file_name)
+        msg.file_urls_request.session_id = self.session_id
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), timeout=self.timeout)
+            fwd = ForwardMsg.FromString(raw)
+            if fwd.WhichOneof("type") == "file_urls_response" and fwd.file_urls_response.response_id == msg.file_urls_request.request_id:
+                urls = fwd.file_urls_response.file_urls[0]
+                break
+
+        await asyncio.to_thread(self._put_file, urls.upload_url, file_name, data, content_type)
+        state = WidgetState(id=self.widgets[label])
+        state.file_uploader_state_value.uploaded_file_info.append(
+            UploadedFileInfo(
+                name=file_name,
+                size=len(data),
+                file_id=urls.file_id,
+                file_urls=FileURLs(file_id=urls.file_id, upload_url=urls.upload_url, delete_url=urls.delete_url),
+            )
+        )
+        self.values[state.id] = state
+
+    def _put_file(self, upload_url, file_name, data, content_type):
+        # The upload endpoint enforces XSRF: echo the cookie the server hands out back as a header
+        headers = {}
+        with request.urlopen(f"{self.base_url}/_stcore/health", timeout=self.timeout) as resp:
+            for cookie in resp.headers.get_all("Set-Cookie") or []:
+                name, _, value = cookie.split(";", 1)[0].partition("=")
+                if name == "_streamlit_xsrf":
+                    headers = {"Cookie": f"{name}={value}", "X-Xsrftoken": value}
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+        url = upload_url if upload_url.startswith("http") else self.base_url + upload_url
+        req = request.Request(url, data=body, headers=headers, method="PUT")
+        with request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+    def chat(self, text):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=self.widgets["chat_input"])
+        state.chat_input_value.data = text
+        return state
+
+
+async def simulate_student_ws(user_id, args, pdf_bytes, rec):
+    import websockets
+
+    stream_url = args.url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+    async with websockets.connect(stream_url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = ServerSession(ws, args.url, args.timeout)
+
+        t0 = time.perf_counter()
+        await session.run()
+        rec.time("first_load", time.perf_counter() - t0)
+
+        session.set_string(SUBMISSION_RADIO, PDF_OPTION)
+        await session.run()
+        # Upload plus the rerun in which the app runs extract_text_from_pdf on it
+        t0 = time.perf_counter()
+        await session.upload(PDF_UPLOADER, f"resume_{user_id}.pdf", pdf_bytes, "application/pdf")
+        session.set_string(ALIAS_INPUT, f"LoadTester{user_id}")
+        await session.run()
+        rec.time("pdf_upload", time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await session.run(triggers=[session.trigger(SUBMIT_BUTTON)])
+        deadline = time.time() + args.timeout
+        while not session.chat_messages:
+            if any("⏳" in body for body in session.alerts):
+                rec.count("rejected")
+                return
+            if any("Corporate Network Error" in body for body in session.alerts) or session.exceptions:
+                rec.count("roast_error")
+                return
+            if not session.fragments:
+                rec.count("roast_lost")
+                return
+            if time.time() > deadline:
+                rec.count("roast_timeout")
+                return
+            # Same as the browser: wait out the fragment's interval, then rerun just the fragment
+            fragment_id, interval = next(iter(session.fragments.items()))
+            await asyncio.sleep(interval)
+            await session.run(fragment_id=fragment_id)
+        rec.time("roast", time.perf_counter() - t0)
+        rec.count("roasted")
+
+        for turn in range(args.chat_turns):
+            t0 = time.perf_counter()
+            await session.run(triggers=[session.chat(f"Actually my GPA is fine ({turn})")])
+            rec.time("chat_reply", time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        session.set_string(SORT_RADIO, "Most Unemployable")
+        await session.run()
+        rec.time("leaderboard", time.perf_counter() - t0)
+
+
+async def run_server_students(users, args, pdf_bytes, rec):
+    async def one(user_id):
+        try:
+            await simulate_student_ws(user_id, args, pdf_bytes, rec)
+        except Exception as e:
+            rec.count(f"crash:{type(e).__name__}")
+
+    await asyncio.gather(*(one(i) for i in range(users)))
+
+
+def start_server(args):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.app, "--server.headless", "true",
+         "--server.port", str(args.port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://localhost:{args.port}"
+    deadline = time.time() + args.timeout
+    while time.time() < deadline:
+        try:
+            with request.urlopen(f"{url}/_stcore/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc, url
+        except OSError:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError(f"streamlit did not come up on port {args.port}")
+
+
+# --- apptest mode: in-process, serialised ---
+
+def find_widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def run_script(target):
+    with SCRIPT_LOCK:
+        return target.run()
+
+
+def simulate_student(user_id, args, pdf_bytes, rec):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(args.app, default_timeout=args.timeout)
+
+    t0 = time.perf_counter()
+    run_script(at)
+    rec.time("first_load", time.perf_counter() - t0)
+
+    candidate_text = resume_text_from_pdf(pdf_bytes, rec)
+    run_script(find_widget(at.radio, SUBMISSION_RADIO).set_value(PASTE_OPTION))
+    at.text_input[0].set_value(f"LoadTester{user_id}")
+    at.text_area[0].set_value(candidate_text)
+    run_script(at)
+
+    t0 = time.perf_counter()
+    run_script(find_widget(at.button, SUBMIT_BUTTON).click())
+    deadline = time.time() + args.timeout
+    while time.time() < deadline:
+        if at.session_state["messages"]:
+            break
+        if any("⏳" in w.value for w in at.warning):
+            rec.count("rejected")
+            return
+        if any("Corporate Network Error" in e.value for e in at.error):
+            rec.count("roast_error")
+            return
+        if not at.session_state["roast_job_id"]:
+            rec.count("roast_lost")
+            return
+        # The app polls from a timed fragment, which AppTest doesn't fire; wait out one interval
+        time.sleep(args.poll)
+        run_script(at)
+    else:
+        rec.count("roast_timeout")
+        return
+    rec.time("roast", time.perf_counter() - t0)
+    rec.count("roasted")
+
+    for turn in range(args.chat_turns):
+        t0 = time.perf_counter()
+        run_script(at.chat_input[0].set_value(f"Actually my GPA is fine ({turn})"))
+        rec.time("chat_reply", time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    run_script(find_widget(at.radio, SORT_RADIO).set_value("Most Unemployable"))
+    rec.time("leaderboard", time.perf_counter() - t0)
+
+
+def run_stage(users, args, pdf_bytes, server_pid=None):
+    rec = Recorder()
+    rss_pid = server_pid or "self"
+    rss_before = rss_mb(rss_pid)
+    start = time.perf_counter()
+    if args.mode == "server":
+        asyncio.run(run_server_students(users, args, pdf_bytes, rec))
+    else:
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            futures = [pool.submit(simulate_student, i, args, pdf_bytes, rec) for i in range(users)]
+            for f in futures:
+                try:
+                    f.result()
+                except Exception as e:
+                    rec.count(f"crash:{type(e).__name__}")
+    wall = time.perf_counter() - start
+    return rec, wall, rss_mb(rss_pid) - rss_before
+
+
+def report(users, rec, wall, rss_growth, model_stats, mode):
+    roasted = rec.outcomes.get("roasted", 0)
+    print(f"\n=== {users} concurrent students ({mode} mode) ===")
+    if mode == "apptest":
+        print("NOTE: apptest mode serialises every script run; latencies include lock wait, not replica capacity.")
+    print(f"wall time: {wall:.1f}s | roasts/s: {roasted / wall:.2f} | outcomes: {rec.outcomes}")
+    rss_label = "server RSS growth" if mode == "server" else "RSS growth"
+    print(f"{rss_label}: {rss_growth:+.1f} MB ({rss_growth / max(users, 1):+.2f} MB/session)")
+    if model_stats:
+        print(f"model calls: {model_stats}")
+    print(f"{'step':<12} {'n':>5} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for step, values in rec.timings.items():
+        print(
+            f"{step:<12} {len(values):>5} {statistics.mean(values):>8.3f} "
+            f"{percentile(values, 50):>8.3f} {percentile(values, 95):>8.3f} {percentile(values, 99):>8.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test app.py against a fake Gemini backend.")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--mode", choices=["server", "apptest"], default="server")
+    parser.add_argument("--url", help="server mode: drive an already running server (start it with FAKE_GEMINI=1)")
+    parser.add_argument("--port", type=int, default=8599, help="server mode: port for the server we start")
+    parser.add_argument("--users", default="5,20,50", help="comma-separated concurrent session counts")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.25)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chat-turns", type=int, default=2)
+    parser.add_argument("--poll", type=float, default=1.0, help="apptest mode: seconds between roast status checks")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-step timeout in seconds")
+    args = parser.parse_args()
+
+    # app.py reads these when it builds its model; a server we start inherits them
+    os.environ["FAKE_GEMINI"] = "1"
+    os.environ["FAKE_GEMINI_LATENCY"] = str(args.latency)
+    os.environ["FAKE_GEMINI_JITTER"] = str(args.jitter)
+    os.environ["FAKE_GEMINI_ERROR_RATE"] = str(args.error_rate)
+    # Keep simulated candidates out of the real Hall of Shame
+    scratch_dir = tempfile.mkdtemp(prefix="roast_load_")
+    os.environ["LEADERBOARD_FILE"] = os.path.join(scratch_dir, "hall_of_shame.csv")
+    os.environ["LEADERBOARD_ROLLUP_DIR"] = os.path.join(scratch_dir, "hall_of_shame_rollups")
+
+    server = None
+    if args.mode == "server" and not args.url:
+        server, args.url = start_server(args)
+        print(f"Started streamlit (pid {server.pid}) on {args.url}")
+        # One throwaway session so imports and warm-up aren't counted as per-session growth
+        asyncio.run(kick_session(args.url, args.timeout))
+    server_pid = server.pid if server else None
+
+    pdf_bytes = make_resume_pdf()
+    try:
+        print(f"Baseline RSS: {rss_mb(server_pid or 'self'):.1f} MB")
+        for users in [int(u) for u in args.users.split(",") if u.strip()]:
+            calls_before = fake_gemini.get_stats()
+            rec, wall, rss_growth = run_stage(users, args, pdf_bytes, server_pid)
+            calls_after = fake_gemini.get_stats()
+            # The stub counts calls in the process running the app, so this is only visible in apptest mode
+            model_stats = {k: calls_after[k] - calls_before[k] for k in calls_after} if args.mode == "apptest" else None
+            report(users, rec, wall, rss_growth, model_stats, args.mode)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
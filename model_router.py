@@ -0,0 +1,133 @@
+# model_router.py
+# Sends each kind of Gemini call to its own ordered list of models.
+# The first model in a route is preferred; on an error or timeout the model is benched
+# for a cooldown and the call falls through to the next tier.
+# Routes come from model_routing.json (written by check_models.py) layered over DEFAULT_ROUTES.
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_ROUTES = {
+    "roast": {"models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"], "timeout": 90},
+    "resume": {"models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"], "timeout": 60},
+    "linkedin": {"models": ["gemini-2.5-flash-lite", "gemini-2.5-flash"], "timeout": 30},
+    "chat": {"models": ["gemini-2.5-flash-lite", "gemini-2.5-flash"], "timeout": 20},
+}
+
+
+def load_routes(path):
+    routes = {call_type: dict(route) for call_type, route in DEFAULT_ROUTES.items()}
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f).get("routes", {})
+            for call_type, route in overrides.items():
+                if route.get("models"):
+                    routes[call_type] = {**routes.get(call_type, {}), **route}
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Routing config unreadable, using defaults: {e}")
+    return routes
+
+
+class RoutedModel:
+    # Drop-in for GenerativeModel.generate_content, bound to one call type
+    def __init__(self, router, call_type):
+        self.router = router
+        self.call_type = call_type
+
+    def generate_content(self, contents, **kwargs):
+        return self.router.generate(self.call_type, contents, **kwargs)
+
+
+class ModelRouter:
+    def __init__(self, routes, model_factory, cooldown_seconds=60):
+        self.routes = routes
+        self.model_factory = model_factory
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._models = {}
+        self._benched_until = {}
+        self._stats = {}  # model name -> {"calls", "failures", "total_latency"}
+
+    def primary(self, call_type):
+        return self._route(call_type)["models"][0]
+
+    def warm(self):
+        # Build every client up front so the first request doesn't pay for it
+        for route in self.routes.values():
+            for name in route["models"]:
+                self._model(name)
+
+    def for_call(self, call_type):
+        return RoutedModel(self, call_type)
+
+    def generate(self, call_type, contents, **kwargs):
+        return self._generate(call_type, lambda name, model, kw: model.generate_content(contents, **kw), **kwargs)
+
+    def generate_with_prefix(self, call_type, prefix, suffix_parts, prefix_cache_for=None, **kwargs):
+        # Same tiering as generate(), but each tier may serve the static prefix from its own
+        # context cache (prefix_cache_for(name) -> PromptPrefixCache or None)
+        def call(name, model, kw):
+            cache = prefix_cache_for(name) if prefix_cache_for else None
+            if cache is None:
+                return model.generate_content([prefix] + list(suffix_parts), **kw)
+            return cache.generate(prefix, suffix_parts, fallback_model=model, **kw)
+
+        return self._generate(call_type, call, **kwargs)
+
+    def _generate(self, call_type, call, **kwargs):
+        route = self._route(call_type)
+        if "timeout" in route:
+            kwargs.setdefault("request_options", {"timeout": route["timeout"]})
+
+        now = time.time()
+        with self._lock:
+            ready = [name for name in route["models"] if self._benched_until.get(name, 0) <= now]
+        # If every tier is benched, still try them rather than failing outright
+        candidates = ready or route["models"]
+
+        last_error = None
+        for name in candidates:
+            started = time.perf_counter()
+            try:
+                response = call(name, self._model(name), kwargs)
+            except Exception as e:
+                last_error = e
+                self._record(name, time.perf_counter() - started, failed=True)
+                print(f"Model {name} failed for {call_type}, falling back: {e}")
+                continue
+            self._record(name, time.perf_counter() - started, failed=False)
+            return response
+        raise last_error
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "calls": s["calls"],
+                    "failures": s["failures"],
+                    "avg_latency_s": round(s["total_latency"] / s["calls"], 3) if s["calls"] else None,
+                    "benched": self._benched_until.get(name, 0) > time.time(),
+                }
+                for name, s in self._stats.items()
+            }
+
+    def _route(self, call_type):
+        return self.routes.get(call_type) or self.routes["roast"]
+
+    def _model(self, name):
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.model_factory(name)
+            return self._models[name]
+
+    def _record(self, name, latency, failed):
+        with self._lock:
+            s = self._stats.setdefault(name, {"calls": 0, "failures": 0, "total_latency": 0.0})
+            s["calls"] += 1
+            s["total_latency"] += latency
+            if failed:
+                s["failures"] += 1
+                self._benched_until[name] = time.time() + self.cooldown_seconds
@@ -0,0 +1,165 @@
+# prompt_cache.py
+# Provider-side caching for the static part of the roast prompt (persona rules, SMU lore,
+# output contract). The prefix is hashed; a cache entry is created once per distinct prefix
+# and reused until its TTL runs low, so editing smu_lore.txt simply rolls over to a new entry.
+
+import datetime
+import hashlib
+import threading
+import time
+
+
+class GeminiCacheBackend:
+    def __init__(self, model_name):
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+
+    def create(self, prefix, ttl_seconds):
+        from google.generativeai import caching
+
+        return caching.CachedContent.create(
+            model=self.model_name,
+            display_name="smu-roast-prefix",
+            system_instruction=prefix,
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+
+    def bind(self, handle):
+        import google.generativeai as genai
+
+        return genai.GenerativeModel.from_cached_content(cached_content=handle)
+
+    def delete(self, handle):
+        handle.delete()
+
+    def is_gone(self, error):
+        # Only these mean the cached content itself is missing or unusable; quota errors,
+        # timeouts and 5xx say nothing about the entry and must not throw it away
+        from google.api_core import exceptions
+
+        if isinstance(error, exceptions.NotFound):
+            return True
+        if isinstance(error, (exceptions.InvalidArgument, exceptions.PermissionDenied, exceptions.FailedPrecondition)):
+            return "cache" in str(error).lower()
+        return False
+
+
+class PromptPrefixCache:
+    def __init__(self, backend, ttl_seconds=3600, refresh_margin=300, retry_after=600, create_timeout=30):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self.create_timeout = create_timeout
+        self._lock = threading.Lock()
+        self._entry = None  # (prefix_hash, handle, bound_model, expires_at)
+        self._uncacheable = {}  # prefix_hash -> retry-at timestamp
+        self._creating = set()  # prefix hashes with a create in progress
+        self.hits = 0
+        self.misses = 0
+
+    def generate(self, prefix, suffix_parts, fallback_model, **kwargs):
+        # kwargs (e.g. request_options with a timeout) apply to whichever path serves the call
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        bound = self._bound_model(key, prefix)
+        if bound is not None:
+            try:
+                return bound.generate_content(suffix_parts, **kwargs)
+            except Exception as e:
+                if not self.backend.is_gone(e):
+                    # Transient (429, timeout, 5xx): keep the entry and let the router bench this tier
+                    raise
+                # Entry was evicted server-side; drop it and send the full prompt
+                print(f"Cached prefix is gone, resending full prompt: {e}")
+                self._drop(key)
+        return fallback_model.generate_content([prefix] + list(suffix_parts), **kwargs)
+
+    def warm(self, prefix):
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        return self._bound_model(key, prefix) is not None
+
+    def _bound_model(self, key, prefix):
+        with self._lock:
+            now = time.time()
+            entry = self._entry if self._entry and self._entry[0] == key else None
+            if entry and entry[3] - self.refresh_margin > now:
+                self.hits += 1
+                return entry[2]
+            if key in self._creating:
+                # Someone else is (re)creating it: use the old entry while it lasts, else the full prompt
+                if entry and entry[3] > now:
+                    self.hits += 1
+                    return entry[2]
+                self.misses += 1
+                return None
+            if self._uncacheable.get(key, 0) > now:
+                self.misses += 1
+                return None
+            self._creating.add(key)
+
+        # Network calls happen outside the lock so a slow create never blocks other workers
+        try:
+            handle, bound = self._create(prefix)
+        except Exception as e:
+            # e.g. prefix below the provider's minimum cacheable size, or the create timed out
+            print(f"Prompt prefix not cacheable: {e}")
+            with self._lock:
+                self._creating.discard(key)
+                self._uncacheable[key] = time.time() + self.retry_after
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._creating.discard(key)
+            stale, self._entry = self._entry, (key, handle, bound, time.time() + self.ttl_seconds)
+            self.misses += 1
+        if stale is not None:
+            self._delete_quietly(stale[1])
+        return bound
+
+    def _create(self, prefix):
+        # CachedContent.create takes no request timeout, so bound it from a side thread; a create
+        # that finishes after we gave up has its entry deleted instead of leaking until TTL
+        result = {}
+        done = threading.Lock()
+
+        def run():
+            try:
+                handle = self.backend.create(prefix, self.ttl_seconds)
+                result["handle"] = handle
+                result["bound"] = self.backend.bind(handle)
+            except Exception as e:
+                result["error"] = e
+            with done:
+                result["finished"] = True
+                abandoned = result.get("abandoned")
+            if abandoned and "handle" in result:
+                self._delete_quietly(result["handle"])
+
+        worker = threading.Thread(target=run, name="prompt-cache-create", daemon=True)
+        worker.start()
+        worker.join(self.create_timeout)
+        with done:
+            if not result.get("finished"):
+                result["abandoned"] = True
+                raise TimeoutError(f"cache create took longer than {self.create_timeout}s")
+        if "error" in result:
+            raise result["error"]
+        return result["handle"], result["bound"]
+
+    def _drop(self, key):
+        with self._lock:
+            if self._entry and self._entry[0] == key:
+                stale, self._entry = self._entry, None
+            else:
+                return
+        self._delete_quietly(stale[1])
+
+    def _delete_quietly(self, handle):
+        try:
+            self.backend.delete(handle)
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": self._entry is not None}
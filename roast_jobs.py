@@ -0,0 +1,166 @@
+# roast_jobs.py
+# Bounded background worker pool for Gemini roast calls.
+# Jobs are keyed by id so a rerun / browser refresh can pick the result back up.
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+@dataclass
+class RoastJob:
+    job_id: str
+    session_key: str
+    fn: object
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    meta: dict = field(default_factory=dict)
+    status: str = "queued"  # queued -> running -> done | failed
+    result: object = None
+    error: str = ""
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+
+
+class RoastJobQueue:
+    """Fixed-size thread pool with one FIFO lane per session, served round-robin.
+
+    Admission control: at most `max_pending` jobs waiting overall and
+    `max_per_session` outstanding per session. Anything beyond that is
+    rejected with QueueFullError instead of piling up behind a slow API.
+    """
+
+    def __init__(self, workers=4, max_pending=32, max_per_session=1, result_ttl=900):
+        self.max_pending = max_pending
+        self.max_per_session = max_per_session
+        self.result_ttl = result_ttl
+        self._cond = threading.Condition()
+        self._lanes = OrderedDict()  # session_key -> deque of job ids
+        self._jobs = {}
+        self._pending = 0
+        self._running = 0
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"roast-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, session_key, fn, *args, meta=None, **kwargs):
+        with self._cond:
+            self._purge_expired()
+            outstanding = sum(
+                1 for job in self._jobs.values()
+                if job.session_key == session_key and job.status in ("queued", "running")
+            )
+            if outstanding >= self.max_per_session:
+                raise QueueFullError("You already have a review in progress.")
+            if self._pending >= self.max_pending:
+                raise QueueFullError("HR is at capacity right now. Try again in a minute.")
+
+            job = RoastJob(
+                job_id=uuid.uuid4().hex,
+                session_key=session_key,
+                fn=fn,
+                args=args,
+                kwargs=kwargs,
+                meta=meta or {},
+            )
+            self._jobs[job.job_id] = job
+            self._lanes.setdefault(session_key, deque()).append(job.job_id)
+            self._pending += 1
+            self._cond.notify()
+            return job.job_id
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job_id):
+        # 0 means running (or finished); N means N jobs will be dispatched before this one
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return 0
+            for i, queued_id in enumerate(self._dispatch_order()):
+                if queued_id == job_id:
+                    return i + 1
+            return 0
+
+    def discard(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in ("done", "failed"):
+                del self._jobs[job_id]
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": self._pending,
+                "running": self._running,
+                "workers": len(self._threads),
+                "tracked_jobs": len(self._jobs),
+            }
+
+    def _dispatch_order(self):
+        # Replays the round-robin the workers will follow
+        lanes = [list(lane) for lane in self._lanes.values()]
+        order = []
+        depth = 0
+        while any(depth < len(lane) for lane in lanes):
+            order.extend(lane[depth] for lane in lanes if depth < len(lane))
+            depth += 1
+        return order
+
+    def _next_job(self):
+        session_key, lane = next(iter(self._lanes.items()))
+        job_id = lane.popleft()
+        if lane:
+            self._lanes.move_to_end(session_key)
+        else:
+            del self._lanes[session_key]
+        return self._jobs[job_id]
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._lanes:
+                    self._cond.wait()
+                job = self._next_job()
+                job.status = "running"
+                job.started_at = time.time()
+                self._pending -= 1
+                self._running += 1
+
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+                error = ""
+                status = "done"
+            except Exception as e:
+                result = None
+                error = str(e)
+                status = "failed"
+
+            with self._cond:
+                job.result = result
+                job.error = error
+                job.status = status
+                job.finished_at = time.time()
+                # Drop the callable + payload (prompt, headshot) once finished
+                job.fn, job.args, job.kwargs = None, (), {}
+                self._running -= 1
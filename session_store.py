@@ -0,0 +1,139 @@
+# session_store.py
+# Per-session memory accounting plus a disk spill area for big blobs (headshots, rendered images).
+# Session state keeps only small values and blob names; bytes live under <root>/<session_key>/.
+
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+
+
+def approx_size(value):
+    # Rough payload size of a session_state value, recursing into containers
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore"))
+    if isinstance(value, dict):
+        return sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def trim_chat_history(messages, max_messages):
+    # Always keep the original roast (first message) plus the most recent replies
+    if max_messages < 2 or len(messages) <= max_messages:
+        return messages
+    return messages[:1] + messages[-(max_messages - 1):]
+
+
+class SessionStateManager:
+    def __init__(self, root_dir, idle_ttl=7200, sweep_every=60):
+        self.root_dir = root_dir
+        self.idle_ttl = idle_ttl
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._sessions = {}  # session_key -> {"state_bytes", "messages", "last_seen"}
+        self._last_sweep = 0.0
+        os.makedirs(root_dir, exist_ok=True)
+
+    def track(self, session_key, state_items):
+        state_bytes = 0
+        messages = 0
+        for key, value in state_items:
+            state_bytes += approx_size(value)
+            if key == "messages":
+                messages = len(value or [])
+        now = time.time()
+        with self._lock:
+            self._sessions[session_key] = {"state_bytes": state_bytes, "messages": messages, "last_seen": now}
+            sweep_due = now - self._last_sweep > self.sweep_every
+            if sweep_due:
+                self._last_sweep = now
+        if sweep_due:
+            self.evict_idle()
+        return state_bytes
+
+    def put_blob(self, session_key, name, data):
+        path = self._blob_path(session_key, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return hashlib.sha1(data).hexdigest()
+
+    def get_blob(self, session_key, name):
+        try:
+            with open(self._blob_path(session_key, name), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def drop_blobs(self, session_key, prefix=""):
+        session_dir = self._session_dir(session_key)
+        if not os.path.isdir(session_dir):
+            return
+        for name in os.listdir(session_dir):
+            if name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(session_dir, name))
+                except OSError:
+                    pass
+
+    def evict_idle(self):
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            idle = [key for key, info in self._sessions.items() if info["last_seen"] < cutoff]
+            for key in idle:
+                del self._sessions[key]
+        # Also sweep directories left behind by a previous process
+        for key in os.listdir(self.root_dir):
+            session_dir = os.path.join(self.root_dir, key)
+            try:
+                stale = key in idle or (key not in self._sessions and os.path.getmtime(session_dir) < cutoff)
+            except OSError:
+                continue
+            if stale:
+                shutil.rmtree(session_dir, ignore_errors=True)
+        return len(idle)
+
+    def report(self):
+        with self._lock:
+            sessions = dict(self._sessions)
+        now = time.time()
+        rows = []
+        for key, info in sessions.items():
+            rows.append({
+                "session": key[:8],
+                "state_kb": round(info["state_bytes"] / 1024, 1),
+                "disk_kb": round(self._disk_bytes(key) / 1024, 1),
+                "messages": info["messages"],
+                "idle_s": int(now - info["last_seen"]),
+            })
+        return sorted(rows, key=lambda r: r["state_kb"] + r["disk_kb"], reverse=True)
+
+    def _disk_bytes(self, session_key):
+        session_dir = self._session_dir(session_key)
+        if not os.path.isdir(session_dir):
+            return 0
+        total = 0
+        for name in os.listdir(session_dir):
+            try:
+                total += os.path.getsize(os.path.join(session_dir, name))
+            except OSError:
+                pass
+        return total
+
+    def _session_dir(self, session_key):
+        if not session_key.isalnum():
+            raise ValueError(f"Bad session key: {session_key!r}")
+        return os.path.join(self.root_dir, session_key)
+
+    def _blob_path(self, session_key, name):
+        if os.path.basename(name) != name:
+            raise ValueError(f"Bad blob name: {name!r}")
+        return os.path.join(self._session_dir(session_key), name)
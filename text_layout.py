@@ -0,0 +1,113 @@
+# text_layout.py
+# Shared text layout for the meme and story card renderers.
+# Glyph advances are measured once per (font, size, char) and reused, so wrapping a line is a
+# single pass of dictionary lookups instead of re-measuring a growing string per word.
+
+import threading
+
+_metrics_lock = threading.Lock()
+_metrics_cache = {}
+
+
+class FontMetrics:
+    def __init__(self, font):
+        self.font = font
+        self._advances = {}
+        ascent, descent = font.getmetrics() if hasattr(font, "getmetrics") else (font.size, 0)
+        self.line_height = ascent + descent
+
+    def char_width(self, ch):
+        width = self._advances.get(ch)
+        if width is None:
+            width = self.font.getlength(ch)
+            self._advances[ch] = width
+        return width
+
+    def width(self, text):
+        return sum(self.char_width(ch) for ch in text)
+
+
+def metrics_for(font):
+    # TrueType fonts are keyed by file and size; bitmap defaults have no path, so key on identity
+    path = getattr(font, "path", None)
+    key = (path, font.size) if path else id(font)
+    with _metrics_lock:
+        metrics = _metrics_cache.get(key)
+        if metrics is None:
+            metrics = FontMetrics(font)
+            _metrics_cache[key] = metrics
+        return metrics
+
+
+def wrap_text(text, metrics, max_width):
+    # Greedy wrap in one pass over the words; each word is measured exactly once
+    space = metrics.char_width(" ")
+    lines = []
+    line_words = []
+    line_width = 0.0
+    for word in text.split():
+        word_width = metrics.width(word)
+        if word_width > max_width:
+            # Longer than a whole line on its own: hard-break it by characters
+            if line_words:
+                lines.append(" ".join(line_words))
+                line_words, line_width = [], 0.0
+            chunk, chunk_width = "", 0.0
+            for ch in word:
+                w = metrics.char_width(ch)
+                if chunk and chunk_width + w > max_width:
+                    lines.append(chunk)
+                    chunk, chunk_width = "", 0.0
+                chunk += ch
+                chunk_width += w
+            line_words, line_width = [chunk], chunk_width
+            continue
+
+        needed = word_width if not line_words else line_width + space + word_width
+        if needed <= max_width:
+            line_words.append(word)
+            line_width = needed
+        else:
+            lines.append(" ".join(line_words))
+            line_words, line_width = [word], word_width
+    if line_words:
+        lines.append(" ".join(line_words))
+    return lines
+
+
+def block_height(metrics, line_count, line_spacing):
+    return line_count * metrics.line_height + max(0, line_count - 1) * line_spacing
+
+
+def fit_text(text, load_font, max_width, max_height, max_size, min_size=12, line_spacing=10):
+    # Binary search for the largest font size whose wrapped block fits the box
+    lo, hi = min_size, max(min_size, max_size)
+    best = None
+    while lo <= hi:
+        size = (lo + hi) // 2
+        metrics = metrics_for(load_font(size))
+        lines = wrap_text(text, metrics, max_width)
+        if block_height(metrics, len(lines), line_spacing) <= max_height:
+            best = (metrics, lines)
+            lo = size + 1
+        else:
+            hi = size - 1
+    if best is None:
+        metrics = metrics_for(load_font(min_size))
+        best = (metrics, wrap_text(text, metrics, max_width))
+    return best
+
+
+def ellipsize(text, metrics, max_width):
+    if metrics.width(text) <= max_width:
+        return text
+    ellipsis_width = metrics.width("...")
+    out = []
+    used = 0.0
+    for ch in text:
+        w = metrics.char_width(ch)
+        if used + w + ellipsis_width > max_width:
+            break
+        out.append(ch)
+        used += w
+    return "".join(out).rstrip() + "..."
@@ -0,0 +1,155 @@
+# warmup.py
+# Primes app.py's caches in a background thread and publishes a readiness file for the load balancer.
+#
+# app.py starts the warm-up on its first script run. To make that happen at process start
+# rather than on the first real visitor, kick one headless session right after launch:
+#   streamlit run app.py & python warmup.py --kick http://localhost:8501
+# Readiness probe (exit 0 once warm; the file is per port so replicas on one host don't collide):
+#   python warmup.py --check --port 8501
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+DEFAULT_PORT = 8501
+
+
+def readiness_file_for(port):
+    return os.path.join(tempfile.gettempdir(), f"smu_roast_ready_{port}.json")
+
+
+class WarmupRunner:
+    def __init__(self, steps, readiness_file):
+        self.steps = steps  # ordered (component name, callable)
+        self.readiness_file = readiness_file
+        self.ready = threading.Event()
+        self.timings = {}
+        self.errors = {}
+        self.total_seconds = None
+
+    def start(self):
+        # A previous process may have left a "ready" file behind
+        if self.readiness_file and os.path.exists(self.readiness_file):
+            os.remove(self.readiness_file)
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+        return self
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "total_s": self.total_seconds,
+            "components": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+    def _run(self):
+        started = time.perf_counter()
+        for name, fn in self.steps:
+            step_started = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                # A failed component just stays cold; it will load lazily on first use
+                self.errors[name] = str(e)
+                print(f"Warm-up step '{name}' failed: {e}")
+            self.timings[name] = round(time.perf_counter() - step_started, 3)
+        self.total_seconds = round(time.perf_counter() - started, 3)
+        self.ready.set()
+        print(f"Warm-up finished in {self.total_seconds}s: {self.timings}")
+        if self.readiness_file:
+            tmp_path = f"{self.readiness_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({**self.status(), "pid": os.getpid(), "finished_at": time.time()}, f, indent=2)
+            os.replace(tmp_path, self.readiness_file)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, just owned by someone else
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+def check_ready(readiness_file):
+    try:
+        with open(readiness_file, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return False
+    # A crashed process leaves its file behind, so the writer must still be running
+    return bool(status.get("ready")) and pid_alive(status.get("pid"))
+
+
+async def kick_session(base_url, timeout):
+    # Opens one headless session and asks it to run the script, which starts the warm-up
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    stream_url = base_url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+    deadline = time.time() + timeout
+    while True:
+        try:
+            async with websockets.connect(stream_url, subprotocols=["streamlit"]) as ws:
+                msg = BackMsg()
+                msg.rerun_script.query_string = ""
+                msg.rerun_script.page_script_hash = ""
+                await ws.send(msg.SerializeToString())
+                # Stay connected until the run completes; disconnecting would stop the script early
+                while True:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=max(1.0, deadline - time.time()))
+                    if ForwardMsg.FromString(raw).WhichOneof("type") == "script_finished":
+                        return True
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            if time.time() > deadline:
+                print(f"Could not reach {stream_url}: {e}")
+                return False
+            await asyncio.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-up kick and readiness probe for app.py.")
+    parser.add_argument("--check", action="store_true", help="exit 0 if warm-up has finished, 1 otherwise")
+    parser.add_argument("--kick", metavar="URL", help="open one headless session on a freshly started server")
+    parser.add_argument("--wait", action="store_true", help="with --kick, block until the readiness file appears")
+    parser.add_argument("--port", type=int, help="server port whose readiness file to read (default: from --kick URL, else 8501)")
+    parser.add_argument("--file", default=os.getenv("READINESS_FILE"), help="explicit readiness file, overrides --port")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    if not args.file:
+        port = args.port or (args.kick and urlparse(args.kick).port) or int(os.getenv("STREAMLIT_SERVER_PORT", DEFAULT_PORT))
+        args.file = readiness_file_for(port)
+
+    if args.kick:
+        if not asyncio.run(kick_session(args.kick, args.timeout)):
+            sys.exit(1)
+        print("Warm-up session ran.")
+        if args.wait:
+            deadline = time.time() + args.timeout
+            while not check_ready(args.file):
+                if time.time() > deadline:
+                    print("Timed out waiting for warm-up.")
+                    sys.exit(1)
+                time.sleep(0.5)
+            with open(args.file, "r", encoding="utf-8") as f:
+                print(f.read())
+        return
+
+    ready = check_ready(args.file)
+    print("ready" if ready else "warming")
+    sys.exit(0 if ready else 1)
+
+
+if __name__ == "__main__":
+    main()